@@ -1,13 +1,25 @@
 import streamlit as st
-import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
 from PIL import Image
+import atexit
 import io
 import time
-import sqlite3
 from datetime import datetime
 
+from colorizer import MODEL_INPUT_SIZE, MAX_BATCH_SIZE, Colorizer, model_version
+from backends import BACKEND, VARIANT, load_backend
+from scheduler import MicroBatchScheduler
+from tiling import colorize_tiled
+from chroma import transfer_chroma
+from result_cache import PredictionCache, ResultCache, cache_key, prediction_key
+from history import DB_NAME, PAGE_SIZE, HistoryStore
+from pipeline import Pipeline, Stage
+from startup import STARTUP_MODE, STATE_FAILED, ModelLoader, warmup_colorizer
+from registry import ModelRegistry
+from artifacts import ArtifactStore
+from encoders import DOWNLOAD_FORMATS, HISTORY_FORMAT, encode_image, output_format
+from ingest import open_image
+from image_store import ImageStore, content_hash
+
 # ======================
 # Konfigurasi Halaman
 # ======================
@@ -19,64 +31,128 @@ st.set_page_config(
 )
 
 # Definisikan path dan nama konstanta
-MODEL_PATH = "best_generator.h5"
-DB_NAME = "colorization_history.db"
-MODEL_INPUT_SIZE = 256
+MODE_RESIZE = "Resize (cepat)"
+MODE_TILED = "Tiled (full resolution)"
+MODE_CHROMA = "Chroma transfer (tajam)"
+# Sisi output maksimum; gambar upload cukup di-decode sampai resolusi ini
+MAX_OUTPUT_SIZE = 2048
 
 # ======================
 # Manajemen Database (SQLite)
 # ======================
+@st.cache_resource
+def get_history_store():
+    store = HistoryStore(DB_NAME, background_writes=True)
+    # Writer berjalan sebagai daemon thread: simpan antrean yang tersisa saat server berhenti
+    atexit.register(store.close)
+    return store
 
-def init_db():
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                original_image BLOB NOT NULL,
-                colorized_image BLOB NOT NULL
-            )
-        """)
-        conn.commit()
+history_store = get_history_store()
 
-def add_to_history(original_bytes, colorized_bytes):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO history (timestamp, original_image, colorized_image) VALUES (?, ?, ?)",
-            (timestamp, original_bytes, colorized_bytes)
-        )
-        conn.commit()
+# ======================
+# Muat Model (registry checkpoint, di background, dengan Caching)
+# ======================
+def load_colorization_model(model_path):
+    # Backend dan varian dipilih lewat environment variable COLORIZE_BACKEND / COLORIZE_VARIANT
+    # Warmup dijalankan sekali, end-to-end lewat Colorizer (lihat registry / loader)
+    model = load_backend(BACKEND, model_path, MODEL_INPUT_SIZE, VARIANT, warm=False)
+    return Colorizer(model, MODEL_INPUT_SIZE, version=f"{model_version(model_path)}:{BACKEND}:{VARIANT}")
+
+# Checkpoint di COLORIZE_MODEL_DIR dimuat saat dipakai; default bisa diganti tanpa restart
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry(load_colorization_model, warmup_fn=warmup_colorizer)
 
-def get_history():
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, timestamp, original_image, colorized_image FROM history ORDER BY id DESC")
-        return cursor.fetchall()
+model_registry = get_model_registry()
 
-def clear_history():
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM history")
-        conn.commit()
+# Halaman dirender tanpa menunggu TensorFlow; mode diatur lewat COLORIZE_STARTUP
+@st.cache_resource
+def get_model_loader():
+    # Load dan warmup model default dijalankan terpisah agar waktunya tampil di sidebar
+    return ModelLoader(lambda: model_registry.get(warmup=False), warmup_colorizer)
 
-init_db()
+model_loader = get_model_loader()
+if STARTUP_MODE == "eager":
+    model_loader.start()
+
+# Satu scheduler dipakai bersama oleh semua session (dan semua model) agar
+# request yang datang bersamaan dijalankan dalam satu batch
+@st.cache_resource
+def get_scheduler():
+    return MicroBatchScheduler(max_batch_size=MAX_BATCH_SIZE)
+
+scheduler = get_scheduler()
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+result_cache = get_result_cache()
+
+# Prediksi mentah dibagi antar session: ganti ukuran output cukup resize ulang
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache()
+
+prediction_cache = get_prediction_cache()
+
+# Bytes download per hasil per format, di-encode sekali saat pertama diminta
+@st.cache_resource
+def get_artifact_store():
+    return ArtifactStore()
+
+artifact_store = get_artifact_store()
+
+# Gambar upload, hasil & prediksi mentah dibagi antar session (memori terbatas + spill ke disk);
+# session state hanya menyimpan hash / kunci
+@st.cache_resource
+def get_image_store():
+    return ImageStore()
+
+image_store = get_image_store()
+
+# Postprocessing tidak bergantung pada model yang dipakai
+postprocessor = Colorizer(None, MODEL_INPUT_SIZE)
+
+def render_prediction(pred, original_image, output_size, mode):
+    if mode == MODE_CHROMA:
+        return transfer_chroma(pred, original_image, output_size)
+    return postprocessor.postprocess(pred, output_size)
+
+def upload_in_store(image_hash):
+    return image_hash is not None and all(
+        f"{image_hash}.{kind}" in image_store for kind in ("upload", "original")
+    )
+
+def encode_result(image):
+    # Format penyimpanan history / cache diatur per deployment (COLORIZE_HISTORY_FORMAT)
+    return encode_image(image, HISTORY_FORMAT)
+
+# Pipeline bertahap: preprocessing, prediksi (lewat scheduler) dan render/encode
+# dari session berbeda berjalan bersamaan di pool masing-masing. Setiap job
+# membawa colorizer-nya sendiri sehingga hot swap tidak memutus job yang berjalan.
+def _pipeline_preprocess(job):
+    job["img_array"] = job["colorizer"].preprocess(job["image"])
+    return job
+
+def _pipeline_predict(job):
+    job["pred"] = scheduler.colorize_array(job["img_array"], colorizer=job["colorizer"])
+    return job
+
+def _pipeline_render(job):
+    colorized_img = render_prediction(job["pred"], job["image"], job["output_size"], job["mode"])
+    return job["pred"], colorized_img, encode_result(colorized_img)
 
-# ======================
-# Muat Model (dengan Caching)
-# ======================
 @st.cache_resource
-def load_colorization_model():
-    try:
-        model = load_model(MODEL_PATH, compile=False)
-        return model
-    except Exception as e:
-        st.error(f"Error memuat model: {e}")
-        return None
+def get_colorize_pipeline():
+    return Pipeline([
+        Stage("preprocess", _pipeline_preprocess, workers=2),
+        # Banyak worker agar request bersamaan bisa digabung oleh scheduler
+        Stage("predict", _pipeline_predict, workers=MAX_BATCH_SIZE),
+        Stage("render", _pipeline_render, workers=2),
+    ])
 
-model = load_colorization_model()
+colorize_pipeline = get_colorize_pipeline()
 
 # ======================
 # CSS Kustom - Modern Dark Theme dengan Animasi Enhanced
@@ -856,16 +932,25 @@ st.markdown("""
 # ======================
 # Inisialisasi Session State
 # ======================
-if 'colorized_image' not in st.session_state:
-    st.session_state.colorized_image = None
-if 'original_image' not in st.session_state:
-    st.session_state.original_image = None
-if 'image_bytes' not in st.session_state:
-    st.session_state.image_bytes = None
+if 'image_hash' not in st.session_state:
+    # Hash isi upload: kunci gambar di image store
+    st.session_state.image_hash = None
+    st.session_state.upload_id = None
 if 'output_width' not in st.session_state:
     st.session_state.output_width = 512
 if 'output_height' not in st.session_state:
     st.session_state.output_height = 1287
+if 'pred_key' not in st.session_state:
+    st.session_state.pred_key = None
+if 'colorized_settings' not in st.session_state:
+    st.session_state.colorized_settings = None
+if 'model_name' not in st.session_state:
+    # None = ikut default global (hot swap berlaku); diisi saat pengguna memilih checkpoint
+    st.session_state.model_name = None
+if 'result_key' not in st.session_state:
+    # Id hasil yang sedang ditampilkan (kunci artifact download)
+    st.session_state.result_key = None
+    st.session_state.result_version = None
 
 # ======================
 # Sidebar - Parameter Settings
@@ -878,7 +963,7 @@ with st.sidebar:
     st.session_state.output_width = st.slider(
         "Width",
         min_value=256,
-        max_value=2048,
+        max_value=MAX_OUTPUT_SIZE,
         value=512,
         step=128,
         help="Lebar gambar output"
@@ -888,23 +973,99 @@ with st.sidebar:
     st.session_state.output_height = st.slider(
         "Height",
         min_value=256,
-        max_value=2048,
+        max_value=MAX_OUTPUT_SIZE,
         value=1287,
         step=128,
         help="Tinggi gambar output"
     )
     
+    st.markdown("#### 🧩 Mode Colorization")
+    st.session_state.colorize_mode = st.radio(
+        "Mode",
+        [MODE_RESIZE, MODE_TILED, MODE_CHROMA],
+        help="Tiled menjalankan model pada tile 256×256 yang saling overlap di resolusi output. "
+             "Chroma transfer memakai warna dari model dan detail (luminance) dari gambar asli."
+    )
+    
+    st.markdown("---")
+    st.markdown("### 🧠 Model")
+    
+    # Status loader diperbarui tiap detik hanya selama model dimuat; di mode lazy
+    # session yang belum upload tidak melakukan polling
+    model_loading = model_loader.started and not model_loader.done
+    
+    @st.fragment(run_every=1 if model_loading else None)
+    def model_status():
+        if model_loading and model_loader.done:
+            # Render ulang seluruh halaman agar polling berhenti
+            st.rerun()
+        if model_loader.ready:
+            st.success(f"✅ Model {model_loader.state}")
+            timings = f"load {model_loader.load_seconds:.1f} s"
+            if model_loader.warmup_seconds is not None:
+                timings += f" • warmup {model_loader.warmup_seconds:.1f} s"
+            st.caption(f"⚙️ {BACKEND}/{VARIANT} • {timings}")
+        elif model_loader.state == STATE_FAILED:
+            st.error(f"❌ Error memuat model: {model_loader.error}")
+        elif model_loader.started:
+            st.info(f"⏳ Model sedang {model_loader.state}...")
+        else:
+            st.caption(f"💤 Model {model_loader.state} (mode {STARTUP_MODE}, dimuat saat gambar diupload)")
+    
+    model_status()
+    
+    # Pilih checkpoint per session; session yang tidak memilih ikut default global (hot swap)
+    model_names = list(model_registry.available())
+    if st.session_state.model_name not in model_names:
+        st.session_state.model_name = None
+    if model_names:
+        if st.session_state.model_name is None:
+            st.session_state.model_choice = (
+                model_registry.default if model_registry.default in model_names else model_names[0]
+            )
+
+        def pin_model():
+            st.session_state.model_name = st.session_state.model_choice
+
+        st.selectbox(
+            "Checkpoint",
+            model_names,
+            key="model_choice",
+            on_change=pin_model,
+            help="Checkpoint generator di folder model. Model dimuat saat pertama dipakai."
+        )
+        # Label opsi dibiarkan tetap (nilai widget dikirim sebagai label): default ditampilkan terpisah
+        st.caption(f"⭐ Default: {model_registry.default}")
+        if st.session_state.model_choice != model_registry.default:
+            if st.button("⭐ Jadikan default", use_container_width=True):
+                with st.spinner("⏳ Memuat & warmup model..."):
+                    try:
+                        model_registry.set_default(st.session_state.model_choice)
+                    except Exception as e:
+                        st.error(f"❌ Error memuat model: {e}")
+                    else:
+                        # Checkpoint ini sekarang default: session kembali ikut default
+                        st.session_state.model_name = None
+                        st.rerun()
+        st.caption(f"💾 Di memori: {', '.join(model_registry.resident()) or '-'}")
+    
     st.markdown("---")
     st.markdown("### 📊 History")
     
-    history_data = get_history()
-    history_count = len(history_data)
+    # Statistik dari counter, tanpa membaca blob
+    history_stats = history_store.stats()
+    history_count = history_stats.count
     
     st.metric("Total Colorizations", history_count)
+    if history_stats.avg_latency_ms is not None:
+        st.caption(f"⏱️ Rata-rata {history_stats.avg_latency_ms:.0f} ms • 💽 {history_stats.total_bytes / 1e6:.1f} MB tersimpan")
+    write_failed, write_error = history_store.write_errors()
+    if write_failed:
+        st.warning(f"⚠️ {write_failed} entri history gagal disimpan ({write_error})")
     
     if history_count > 0:
         if st.button("🗑️ Clear All History", use_container_width=True):
-            clear_history()
+            history_store.clear()
             st.success("✅ History cleared!")
             time.sleep(1)
             st.rerun()
@@ -940,14 +1101,39 @@ uploaded_file = st.file_uploader(
 )
 
 if uploaded_file is not None:
-    # Hanya reset jika file berbeda
-    new_bytes = uploaded_file.getvalue()
-    if st.session_state.image_bytes != new_bytes:
-        st.session_state.image_bytes = new_bytes
-        st.session_state.original_image = Image.open(io.BytesIO(st.session_state.image_bytes)).convert("RGB")
-        st.session_state.colorized_image = None
-        st.success("✅ Gambar berhasil diupload!")
-        st.balloons()
+    # Mode lazy: mulai muat model sambil pengguna mengatur output
+    if not model_loader.started:
+        model_loader.start()
+        # Sidebar sudah dirender tanpa polling: render ulang agar status loader terpantau
+        st.rerun()
+    # Upload yang sama tidak dibaca ulang; file baru dibandingkan lewat hash, tanpa salinan bytes.
+    # Bytes upload (untuk history) dan gambar hasil decode bisa dievict / di-prune terpisah:
+    # ingest ulang jika salah satunya hilang
+    if (
+        uploaded_file.file_id != st.session_state.upload_id
+        or not upload_in_store(st.session_state.image_hash)
+    ):
+        image_hash = content_hash(uploaded_file.getbuffer())
+        if image_hash != st.session_state.image_hash or not upload_in_store(image_hash):
+            try:
+                # Decode terbatas: JPEG langsung di skala kecil, batas piksel, orientasi EXIF
+                original_image = open_image(io.BytesIO(uploaded_file.getbuffer()), (MAX_OUTPUT_SIZE, MAX_OUTPUT_SIZE))
+            except (ValueError, OSError) as e:
+                st.error(f"❌ Gambar tidak dapat dibuka: {e}")
+                image_hash = None
+            else:
+                image_store.put(f"{image_hash}.upload", uploaded_file.getvalue())
+                image_store.put(f"{image_hash}.original", original_image)
+                st.session_state.image_hash = image_hash
+                st.session_state.pred_key = None
+                st.session_state.colorized_settings = None
+                st.session_state.result_key = None
+                st.success("✅ Gambar berhasil diupload!")
+                st.balloons()
+        if image_hash is not None:
+            st.session_state.upload_id = uploaded_file.file_id
+
+original_image = image_store.get(f"{st.session_state.image_hash}.original") if st.session_state.image_hash else None
 
 # Preview Settings
 st.markdown('''
@@ -971,6 +1157,29 @@ with col_slider2:
 
 st.markdown("---")
 
+# Ukuran output / mode berubah: render ulang dari prediksi mentah tanpa model.predict
+current_settings = (
+    (st.session_state.output_width, st.session_state.output_height),
+    st.session_state.colorize_mode,
+)
+if (
+    st.session_state.pred_key is not None
+    and original_image is not None
+    and st.session_state.colorized_settings is not None
+    and st.session_state.colorized_settings != current_settings
+    and st.session_state.colorize_mode != MODE_TILED
+):
+    raw_prediction = image_store.get(f"{st.session_state.pred_key}.pred")
+    if raw_prediction is not None:
+        result_key = cache_key(
+            st.session_state.image_hash.encode("ascii"), st.session_state.result_version, *current_settings
+        )
+        image_store.put(f"{result_key}.colorized", render_prediction(raw_prediction, original_image, *current_settings))
+        st.session_state.colorized_settings = current_settings
+        st.session_state.result_key = result_key
+
+colorized_image = image_store.get(f"{st.session_state.result_key}.colorized") if st.session_state.result_key else None
+
 # ======================
 # Main Display Area - Input & Output
 # ======================
@@ -991,11 +1200,11 @@ with col1:
         ">📥 Input</div>
     ''', unsafe_allow_html=True)
     
-    if st.session_state.original_image is not None:
-        st.image(st.session_state.original_image, use_container_width=True)
+    if original_image is not None:
+        st.image(original_image, use_container_width=True)
         
         # Show image info
-        width, height = st.session_state.original_image.size
+        width, height = original_image.size
         st.caption(f"📐 Dimensi: {width} × {height} px")
     else:
         st.info("📤 Silakan upload gambar terlebih dahulu")
@@ -1015,77 +1224,125 @@ with col2:
         ">📤 Output</div>
     ''', unsafe_allow_html=True)
     
-    if st.session_state.colorized_image is not None:
-        st.image(st.session_state.colorized_image, use_container_width=True)
+    if colorized_image is not None:
+        st.image(colorized_image, use_container_width=True)
         
         # Show output info
-        width, height = st.session_state.colorized_image.size
+        width, height = colorized_image.size
         st.caption(f"📐 Dimensi: {width} × {height} px")
         
-        # Download buttons
+        # Download: format dipilih per request; encode baru terjadi saat tombol diklik, sekali per hasil
         col_download1, col_download2 = st.columns(2)
         
         with col_download1:
-            buf_png = io.BytesIO()
-            st.session_state.colorized_image.save(buf_png, format="PNG")
-            st.download_button(
-                label="💾 Download PNG",
-                data=buf_png.getvalue(),
-                file_name=f"colorized_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
-                mime="image/png",
-                use_container_width=True
+            download_format = st.selectbox(
+                "Format download",
+                DOWNLOAD_FORMATS,
+                format_func=lambda name: output_format(name)[4],
+                label_visibility="collapsed"
             )
         
         with col_download2:
-            buf_jpg = io.BytesIO()
-            st.session_state.colorized_image.convert("RGB").save(buf_jpg, format="JPEG", quality=95)
+            _, _, download_mime, download_ext, download_label = output_format(download_format)
             st.download_button(
-                label="💾 Download JPG",
-                data=buf_jpg.getvalue(),
-                file_name=f"colorized_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg",
-                mime="image/jpeg",
+                label=f"💾 Download {download_label}",
+                data=artifact_store.download(
+                    st.session_state.result_key, download_format, colorized_image
+                ),
+                file_name=f"colorized_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{download_ext}",
+                mime=download_mime,
                 use_container_width=True
             )
     else:
         st.info("🎨 Hasil colorization akan muncul di sini")
 
 # Colorize Button
-if st.session_state.original_image is not None:
+if original_image is not None:
     if st.button("✨ COLORIZE IMAGE", use_container_width=True):
-        if model is not None:
+        colorizer = load_error = None
+        try:
+            # Model yang belum ada di memori dimuat dulu (hanya sekali)
+            with st.spinner("⏳ Menunggu model siap..."):
+                model_loader.wait()
+                colorizer = model_registry.get(st.session_state.model_name)
+        except Exception as e:
+            load_error = e
+        if colorizer is not None:
             try:
                 with st.spinner("🎨 AI sedang mewarnai gambar Anda..."):
                     progress_bar = st.progress(0)
+                    start_time = time.perf_counter()
                     
-                    # Preprocessing
-                    original_image = st.session_state.original_image
-                    img_resized = original_image.resize((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE))
-                    progress_bar.progress(25)
-                    
-                    img_array = np.array(img_resized) / 255.0
-                    img_array_expanded = np.expand_dims(img_array, axis=0)
-                    progress_bar.progress(50)
-                    
-                    # Prediksi
-                    pred_array = model.predict(img_array_expanded, verbose=0)
-                    progress_bar.progress(75)
-                    
-                    # Postprocessing
-                    pred_clipped = np.clip(pred_array[0], 0, 1)
-                    colorized_img = Image.fromarray((pred_clipped * 255).astype(np.uint8))
-                    
-                    # Resize to output dimensions
                     output_size = (st.session_state.output_width, st.session_state.output_height)
-                    colorized_img = colorized_img.resize(output_size, Image.LANCZOS)
+                    # Hash konten mewakili bytes upload di kunci cache
+                    image_id = st.session_state.image_hash.encode("ascii")
+                    result_key = cache_key(
+                        image_id, colorizer.version, output_size, f"{st.session_state.colorize_mode}|{HISTORY_FORMAT}"
+                    )
+                    colorized_bytes = result_cache.get(result_key)
+                    pred_key = prediction_key(image_id, colorizer.version)
+                    
+                    if colorized_bytes is not None:
+                        # Cache hit: lewati preprocessing dan prediksi
+                        colorized_img = Image.open(io.BytesIO(colorized_bytes))
+                        colorized_img.load()
+                        cached_pred = prediction_cache.get(pred_key)
+                        if cached_pred is not None:
+                            image_store.put(f"{pred_key}.pred", cached_pred)
+                            st.session_state.pred_key = pred_key
+                        else:
+                            # Kunci lama bisa milik model lain: jangan render ulang dari prediksi itu
+                            st.session_state.pred_key = None
+                    else:
+                        if st.session_state.colorize_mode == MODE_TILED:
+                            # Prediksi per tile di resolusi output
+                            progress_bar.progress(25)
+                            colorized_img = colorize_tiled(colorizer, original_image, output_size)
+                            colorized_bytes = encode_result(colorized_img)
+                            # Tiled tidak menghasilkan prediksi mentah; kunci lama bisa milik model lain
+                            st.session_state.pred_key = None
+                        else:
+                            pred = prediction_cache.get(pred_key)
+                            if pred is None:
+                                # Preprocessing, prediksi, postprocessing & encode lewat pipeline
+                                progress_bar.progress(50)
+                                pred, colorized_img, colorized_bytes = colorize_pipeline.submit({
+                                    "colorizer": colorizer,
+                                    "image": original_image,
+                                    "output_size": output_size,
+                                    "mode": st.session_state.colorize_mode,
+                                }).result()
+                                prediction_cache.put(pred_key, pred)
+                            else:
+                                # Postprocessing & resize to output dimensions
+                                colorized_img = render_prediction(
+                                    pred, original_image, output_size, st.session_state.colorize_mode
+                                )
+                                colorized_bytes = encode_result(colorized_img)
+                            progress_bar.progress(75)
+                            image_store.put(f"{pred_key}.pred", pred)
+                            st.session_state.pred_key = pred_key
+                        
+                        result_cache.put(result_key, colorized_bytes)
                     progress_bar.progress(90)
                     
                     # Simpan ke database
-                    buf_colorized = io.BytesIO()
-                    colorized_img.save(buf_colorized, format="PNG")
-                    add_to_history(st.session_state.image_bytes, buf_colorized.getvalue())
+                    latency_ms = (time.perf_counter() - start_time) * 1000
+                    upload_bytes = image_store.get(f"{st.session_state.image_hash}.upload")
+                    if upload_bytes is None and uploaded_file is not None:
+                        # Terhapus dari image store sejak dicek di atas: pakai bytes dari widget upload
+                        upload_bytes = uploaded_file.getvalue()
+                        image_store.put(f"{st.session_state.image_hash}.upload", upload_bytes)
+                    if upload_bytes is not None:
+                        history_store.submit(upload_bytes, colorized_bytes, latency_ms, colorizer.version)
                     
-                    # Set session state
-                    st.session_state.colorized_image = colorized_img
+                    # Set session state (gambar di image store, session hanya menyimpan kunci)
+                    image_store.put(f"{result_key}.colorized", colorized_img)
+                    st.session_state.colorized_settings = (output_size, st.session_state.colorize_mode)
+                    st.session_state.result_key = result_key
+                    st.session_state.result_version = colorizer.version
+                    # Bytes untuk history/cache sudah ada: download format yang sama tidak perlu encode ulang
+                    artifact_store.put_encoded(result_key, HISTORY_FORMAT, colorized_bytes)
                     progress_bar.progress(100)
                     time.sleep(0.5)
                     
@@ -1096,7 +1353,7 @@ if st.session_state.original_image is not None:
             except Exception as e:
                 st.error(f"❌ Error saat colorization: {str(e)}")
         else:
-            st.error("❌ Model tidak dapat dimuat. Pastikan file model tersedia.")
+            st.error(f"❌ Model tidak dapat dimuat ({load_error}). Pastikan file model tersedia.")
 
 st.markdown("---")
 
@@ -1142,29 +1399,49 @@ st.markdown('''
     ">📜 Colorization History</div>
 ''', unsafe_allow_html=True)
 
-history_data = get_history()
+history_total = history_stats.count
 
-if not history_data:
+if history_total == 0:
     st.info("📂 Riwayat colorization Anda akan muncul di sini")
 else:
-    # Show latest 5 items
-    for idx, item in enumerate(history_data[:5]):
-        _, timestamp, original_bytes, colorized_bytes = item
-        
+    # Pagination: hanya metadata satu halaman yang dibaca dari database
+    page_count = (history_total + PAGE_SIZE - 1) // PAGE_SIZE
+    page = st.number_input("Halaman", min_value=1, max_value=page_count, value=1, step=1)
+    st.caption(f"Halaman {page} dari {page_count} • {history_total} entri")
+    history_data = history_store.list_entries(limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+    
+    for idx, item in enumerate(history_data):
         with st.container():
             st.markdown('<div class="history-item">', unsafe_allow_html=True)
-            st.caption(f"🕐 {timestamp}")
+            st.caption(f"🕐 {item.timestamp}" + (f" • 🧠 {item.model_version}" if item.model_version else ""))
+            
+            # Gallery memakai thumbnail; blob penuh hanya dibaca jika diminta
+            show_full = st.toggle("🔍 Resolusi penuh", key=f"history_full_{item.id}")
             
             hist_col1, hist_col2 = st.columns(2, gap="medium")
             
             with hist_col1:
-                st.image(original_bytes, caption="Original", use_container_width=True)
+                if show_full:
+                    original_data = history_store.get_blob(item.original_hash)
+                else:
+                    original_data = history_store.get_thumbnail(item)
+                if original_data:
+                    st.image(original_data, caption="Original", use_container_width=True)
+                else:
+                    st.caption("🚫 Gambar original tidak tersedia")
             with hist_col2:
-                st.image(colorized_bytes, caption="Colorized", use_container_width=True)
+                if show_full:
+                    colorized_data = history_store.get_blob(item.colorized_hash)
+                else:
+                    colorized_data = history_store.get_thumbnail(item, colorized=True)
+                if colorized_data:
+                    st.image(colorized_data, caption="Colorized", use_container_width=True)
+                else:
+                    st.caption("🚫 Gambar colorized tidak tersedia")
                 
             st.markdown('</div>', unsafe_allow_html=True)
         
-        if idx < len(history_data[:5]) - 1:
+        if idx < len(history_data) - 1:
             st.markdown("<br>", unsafe_allow_html=True)
 
 # Footer
@@ -0,0 +1,34 @@
+from encoders import encode_image
+from result_cache import ResultCache
+
+ARTIFACT_BUDGET_BYTES = 128 * 1024 * 1024
+
+
+# ======================
+# Artifact Store (encode sekali per hasil per format, memory saja)
+# ======================
+class ArtifactStore(ResultCache):
+    # Kunci: id hasil (cache_key) + format. Encode baru dilakukan saat bytes
+    # benar-benar diminta, lalu dipakai ulang oleh rerun dan session lain.
+
+    def __init__(self, memory_budget=ARTIFACT_BUDGET_BYTES):
+        super().__init__(cache_dir=None, memory_budget=memory_budget)
+
+    def put_encoded(self, result_id, fmt, data):
+        # Bytes yang sudah ada (mis. PNG untuk history) tidak perlu di-encode ulang
+        if result_id is not None:
+            self.put(f"{result_id}.{fmt}", data)
+
+    def encoded(self, result_id, fmt, image):
+        if result_id is None:
+            return encode_image(image, fmt)
+        key = f"{result_id}.{fmt}"
+        data = self.get(key)
+        if data is None:
+            data = encode_image(image, fmt)
+            self.put(key, data)
+        return data
+
+    def download(self, result_id, fmt, image):
+        # Callable untuk st.download_button: encode baru terjadi saat tombol diklik
+        return lambda: self.encoded(result_id, fmt, image)
@@ -0,0 +1,268 @@
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from colorizer import MODEL_PATH, MODEL_INPUT_SIZE, load_colorization_model
+
+BACKEND = os.environ.get("COLORIZE_BACKEND", "keras")
+BACKENDS = ("keras", "savedmodel", "tflite", "onnx")
+# Varian terkuantisasi (lihat quantize.py), hanya untuk backend tflite
+VARIANT = os.environ.get("COLORIZE_VARIANT", "float32")
+# Batch sampai ukuran ini lewat tf.function langsung, lebih besar lewat model.predict
+FAST_PATH_MAX_BATCH = 16
+
+
+def artifact_path(kind, model_path=MODEL_PATH, variant="float32"):
+    base = os.path.splitext(model_path)[0]
+    if variant != "float32":
+        if kind != "tflite":
+            raise ValueError(f"Varian {variant} hanya tersedia untuk backend tflite")
+        return f"{base}.{variant}.tflite"
+    return {
+        "keras": model_path,
+        "savedmodel": f"{base}_savedmodel",
+        "tflite": f"{base}.tflite",
+        "onnx": f"{base}.onnx",
+    }[kind]
+
+
+def _serving_function(model, input_size):
+    import tensorflow as tf
+
+    @tf.function(input_signature=[tf.TensorSpec([None, input_size, input_size, 3], tf.float32)])
+    def serve(x):
+        return model(x, training=False)
+
+    return serve
+
+
+# ======================
+# Export (sekali, dari generator Keras)
+# ======================
+# Artefak ditulis ke path sementara lalu di-rename, sehingga replica / proses lain
+# tidak pernah membuka artefak yang setengah jadi.
+def _tmp_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _publish(tmp_path, path):
+    if not os.path.isdir(tmp_path):
+        os.replace(tmp_path, path)
+        return
+    # os.replace tidak bisa menimpa direktori yang berisi: pindahkan versi lama dulu
+    if os.path.exists(path):
+        old_path = f"{tmp_path}.old"
+        os.replace(path, old_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Proses lain sudah lebih dulu menaruh hasil export yang sama
+        if not os.path.exists(path):
+            raise
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _export_atomic(export, path):
+    tmp_path = _tmp_path(path)
+    try:
+        export(tmp_path)
+        _publish(tmp_path, path)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+    return path
+
+
+def export_savedmodel(model, path, input_size=MODEL_INPUT_SIZE):
+    import tensorflow as tf
+
+    module = tf.Module()
+    module.model = model
+    module.serve = _serving_function(model, input_size)
+    return _export_atomic(
+        lambda tmp_path: tf.saved_model.save(module, tmp_path, signatures={"serving_default": module.serve}), path
+    )
+
+
+def export_tflite(model, path, input_size=MODEL_INPUT_SIZE, optimizations=None, representative_dataset=None,
+                  supported_types=None):
+    import tensorflow as tf
+
+    # Ukuran batch dibiarkan dinamis; backend me-resize input sesuai batch
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if optimizations:
+        converter.optimizations = optimizations
+    if representative_dataset is not None:
+        converter.representative_dataset = representative_dataset
+    if supported_types:
+        converter.target_spec.supported_types = supported_types
+    data = converter.convert()
+
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+    return _export_atomic(write, path)
+
+
+def export_onnx(model, path, input_size=MODEL_INPUT_SIZE):
+    import tensorflow as tf
+
+    try:
+        import tf2onnx
+    except ImportError as e:
+        raise ImportError("Export ONNX membutuhkan paket tf2onnx") from e
+    spec = (tf.TensorSpec([None, input_size, input_size, 3], tf.float32, name="input"),)
+    return _export_atomic(
+        lambda tmp_path: tf2onnx.convert.from_function(
+            _serving_function(model, input_size), input_signature=spec, output_path=tmp_path
+        ),
+        path
+    )
+
+
+EXPORTERS = {
+    "savedmodel": export_savedmodel,
+    "tflite": export_tflite,
+    "onnx": export_onnx,
+}
+
+
+# ======================
+# Backend Inferensi
+# ======================
+# Semua backend meniru model.predict(batch, batch_size=..., verbose=0) milik
+# Keras sehingga bisa langsung dipakai oleh Colorizer.
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, model, input_size=MODEL_INPUT_SIZE, fast_path_max_batch=FAST_PATH_MAX_BATCH):
+        import tensorflow as tf
+
+        self._tf = tf
+        self.model = model
+        self.input_size = input_size
+        self.fast_path_max_batch = fast_path_max_batch
+        # model.predict membangun data adapter + callback di setiap panggilan; untuk
+        # request interaktif (batch kecil) panggil graph yang sudah di-trace langsung.
+        self._serve = _serving_function(model, input_size) if fast_path_max_batch else None
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        if self._serve is not None and len(batch) <= self.fast_path_max_batch:
+            return self._serve(self._tf.constant(batch, dtype=self._tf.float32)).numpy()
+        return self.model.predict(batch, batch_size=batch_size, verbose=verbose)
+
+
+class SavedModelBackend:
+    name = "savedmodel"
+
+    def __init__(self, path):
+        import tensorflow as tf
+
+        self._tf = tf
+        self._loaded = tf.saved_model.load(path)
+        self._serve = self._loaded.serve
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        return self._serve(self._tf.constant(batch, dtype=self._tf.float32)).numpy()
+
+
+class TFLiteBackend:
+    name = "tflite"
+
+    def __init__(self, path, num_threads=None):
+        # XNNPACK adalah delegate default interpreter TFLite untuk model float di CPU.
+        # tf.lite.Interpreter sudah deprecated; pakai LiteRT jika terpasang.
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+        self._interpreter = Interpreter(model_path=path, num_threads=num_threads or os.cpu_count())
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+        # Interpreter TFLite tidak thread-safe
+        self._lock = threading.Lock()
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if self._batch_size != batch.shape:
+                self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = batch.shape
+            self._interpreter.set_tensor(self._input["index"], batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output["index"]).copy()
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, path, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("Backend ONNX membutuhkan paket onnxruntime") from e
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self._session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_name = self._session.get_inputs()[0].name
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        return self._session.run(None, {self._input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+
+def warmup(backend, input_size=MODEL_INPUT_SIZE, batch_size=1):
+    # Trace graph / alokasi tensor sekarang, bukan saat klik pertama
+    backend.predict(np.zeros((batch_size, input_size, input_size, 3), dtype=np.float32), batch_size=batch_size)
+    return backend
+
+
+def open_backend(kind, path, input_size=MODEL_INPUT_SIZE):
+    if kind == "keras":
+        return KerasBackend(load_colorization_model(path), input_size)
+    if kind == "savedmodel":
+        return SavedModelBackend(path)
+    if kind == "tflite":
+        return TFLiteBackend(path)
+    if kind == "onnx":
+        return OnnxBackend(path)
+    raise ValueError(f"Backend tidak dikenal: {kind} (pilihan: {', '.join(BACKENDS)})")
+
+
+def load_backend(kind=BACKEND, model_path=MODEL_PATH, input_size=MODEL_INPUT_SIZE, variant=VARIANT, warm=True):
+    # Export otomatis jika artefak backend belum ada atau lebih lama dari checkpoint
+    path = artifact_path(kind, model_path, variant)
+    if kind != "keras" and (not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(model_path)):
+        if variant == "int8":
+            # Kalibrasi butuh gambar grayscale nyata: artefak dibuat lewat quantize.py, tidak otomatis
+            raise FileNotFoundError(
+                f"Artefak int8 {path} belum ada atau lebih lama dari {model_path}; buat dengan "
+                f"python quantize.py --model {model_path} --variants int8 --calibration-dir <folder>"
+            )
+        model = load_colorization_model(model_path)
+        if variant != "float32":
+            from quantize import export_quantized
+
+            export_quantized(model, path, variant, input_size=input_size)
+        else:
+            EXPORTERS[kind](model, path, input_size)
+    backend = open_backend(kind, path, input_size)
+    # warm=False: pemanggil menjalankan warmup sendiri (mis. end-to-end lewat Colorizer)
+    return warmup(backend, input_size) if warm else backend
@@ -0,0 +1,317 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from chroma import transfer_chroma
+from colorizer import MODEL_PATH, MAX_BATCH_SIZE, Colorizer, model_version
+from ingest import open_image
+from pipeline import Pipeline, Stage
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+DONE_MANIFEST = ".done"
+REPORT_INTERVAL = 10.0
+
+
+# ======================
+# Input
+# ======================
+def collect_inputs(sources, manifest=None):
+    # Hasil: list (path, nama relatif output)
+    paths = []
+    roots = []
+    for source in sources:
+        if os.path.isdir(source):
+            # Struktur di bawah folder input dipertahankan di output
+            roots.append(os.path.abspath(source))
+            for root, _, files in os.walk(source):
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        paths.append(os.path.join(root, name))
+        else:
+            for path in sorted(glob.glob(source, recursive=True)):
+                if os.path.isfile(path):
+                    paths.append(path)
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                path = line.strip()
+                if path and not path.startswith("#"):
+                    paths.append(path)
+    return assign_output_names(paths, roots)
+
+
+def assign_output_names(paths, roots=()):
+    # Nama output = path relatif terhadap folder induk bersama semua input, sehingga
+    # scans/2020/001.jpg dan scans/2021/001.jpg tidak menulis ke file yang sama
+    unique = {}
+    for path in paths:
+        unique.setdefault(os.path.abspath(path), path)
+    if not unique:
+        return []
+    try:
+        common = os.path.commonpath(list(roots) + [os.path.dirname(path) for path in unique])
+    except ValueError:
+        # Drive berbeda (Windows): tidak ada folder induk bersama
+        common = None
+
+    items = []
+    used = set()
+    collisions = 0
+    for abs_path, path in unique.items():
+        relname = os.path.relpath(abs_path, common) if common else os.path.basename(abs_path)
+        key = os.path.normcase(os.path.splitext(relname)[0])
+        if key in used:
+            # Nama sama setelah ekstensi diganti (001.jpg vs 001.png): tambahkan hash nama
+            # relatif (bukan path absolut, agar sama di semua host)
+            stem, ext = os.path.splitext(relname)
+            relname = f"{stem}.{hashlib.sha1(relname.replace(os.sep, '/').encode('utf-8')).hexdigest()[:12]}{ext}"
+            key = os.path.normcase(os.path.splitext(relname)[0])
+            collisions += 1
+        used.add(key)
+        items.append((path, relname))
+    if collisions:
+        print(f"{collisions} nama output bentrok, diberi akhiran hash path", file=sys.stderr)
+    return items
+
+
+def load_done(done_path):
+    if not os.path.exists(done_path):
+        return set()
+    with open(done_path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def job_settings(mode, output_size, version):
+    # Pengaturan yang menentukan isi output; disimpan di samping done-manifest
+    return {"mode": mode, "output_size": list(output_size) if output_size else None, "model_version": version}
+
+
+def check_settings(done_path, settings):
+    # Done-manifest hanya berlaku untuk pengaturan yang sama; tanpa ini output lama
+    # dengan mode / ukuran / model lain dianggap selesai dan dilewati diam-diam
+    settings_path = f"{done_path}.settings.json"
+    if os.path.exists(settings_path):
+        with open(settings_path, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous != settings:
+            raise ValueError(
+                f"{done_path} dibuat dengan pengaturan lain ({previous}, sekarang {settings}); "
+                f"pakai --output-dir lain atau hapus done-manifest untuk memproses ulang"
+            )
+    elif load_done(done_path):
+        raise ValueError(f"{done_path} tidak punya catatan pengaturan; hapus untuk memproses ulang")
+    else:
+        os.makedirs(os.path.dirname(settings_path) or ".", exist_ok=True)
+        with open(settings_path, "w", encoding="utf-8") as f:
+            json.dump(settings, f)
+
+
+def output_path_for(output_dir, relname, ext=".png"):
+    return os.path.join(output_dir, os.path.splitext(relname)[0] + ext)
+
+
+# ======================
+# Record History per Run
+# ======================
+# Setiap run menulis file record sendiri (<base>.<run id>.jsonl). Selama run berjalan
+# file berakhiran .part; baru di-rename ke .jsonl setelah run selesai, jadi merge
+# hanya membaca file yang tidak akan ditulis lagi.
+def run_records_path(records_path, run_id):
+    root, ext = os.path.splitext(records_path)
+    return f"{root}.{run_id}{ext}"
+
+
+def finish_records(records_path):
+    # File .part sisa run yang terhenti (proses di-kill) diselesaikan agar ikut di-merge
+    root, ext = os.path.splitext(records_path)
+    for part_path in glob.glob(f"{glob.escape(root)}.*{ext}.part"):
+        os.replace(part_path, part_path[:-len(".part")])
+
+
+# ======================
+# Batch Runner
+# ======================
+class BatchRunner:
+    def __init__(self, colorizer, output_dir, output_size=None, mode="resize",
+                 batch_size=MAX_BATCH_SIZE, decode_workers=4, encode_workers=4, queue_size=None,
+                 done_path=None, records_path=None, report_interval=REPORT_INTERVAL, name=""):
+        self.colorizer = colorizer
+        self.output_dir = output_dir
+        self.output_size = output_size
+        self.mode = mode
+        self.batch_size = batch_size
+        self.decode_workers = decode_workers
+        self.encode_workers = encode_workers
+        self.queue_size = queue_size or batch_size * 2
+        self.done_path = done_path or os.path.join(output_dir, DONE_MANIFEST)
+        self.records_path = records_path
+        self.report_interval = report_interval
+        self.name = name
+
+    def _decode(self, item):
+        path, relname = item
+        # Mode resize cukup resolusi input model; chroma butuh resolusi output
+        if self.mode == "chroma":
+            cover_size = self.output_size
+        else:
+            cover_size = (self.colorizer.input_size, self.colorizer.input_size)
+        image = open_image(path, cover_size)
+        img_array = self.colorizer.preprocess(image)
+        # Gambar asli hanya disimpan jika mode chroma membutuhkannya
+        return item, image if self.mode == "chroma" else None, img_array
+
+    def _infer(self, batch):
+        preds = self.colorizer.predict_batch([img_array for _, _, img_array in batch])
+        return [(item, image, pred) for (item, image, _), pred in zip(batch, preds)]
+
+    def _encode(self, work):
+        (path, relname), image, pred = work
+        if self.mode == "chroma":
+            colorized_img = transfer_chroma(pred, image, self.output_size)
+        else:
+            colorized_img = self.colorizer.postprocess(pred, self.output_size)
+        out_path = output_path_for(self.output_dir, relname)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        # Tulis ke file sementara dulu agar output setengah jadi tidak dianggap selesai
+        tmp_path = out_path + ".tmp"
+        colorized_img.save(tmp_path, format="PNG")
+        os.replace(tmp_path, out_path)
+        return out_path
+
+    def build_pipeline(self):
+        return Pipeline([
+            Stage("decode", self._decode, workers=self.decode_workers),
+            Stage("infer", self._infer, batch_size=self.batch_size),
+            Stage("encode", self._encode, workers=self.encode_workers),
+        ], queue_size=self.queue_size)
+
+    def settings(self):
+        return job_settings(self.mode, self.output_size, self.colorizer.version)
+
+    def run(self, items):
+        os.makedirs(self.output_dir, exist_ok=True)
+        check_settings(self.done_path, self.settings())
+        # Done-manifest berisi nama relatif (sama di semua host), bukan path input
+        done = load_done(self.done_path)
+        todo = [item for item in items if item[1] not in done]
+        self.total = len(todo)
+        self.completed = 0
+        self.failed = 0
+        self.start_time = time.monotonic()
+        self._last_report = self.start_time
+        print(f"{self.name}{len(items)} gambar, {len(items) - len(todo)} sudah selesai, {len(todo)} diproses")
+
+        records = None
+        if self.records_path:
+            finish_records(self.records_path)
+        if self.records_path and todo:
+            run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            records_path = run_records_path(self.records_path, run_id)
+            records = open(f"{records_path}.part", "a", encoding="utf-8")
+        try:
+            self._run(todo, records)
+        finally:
+            if records is not None:
+                records.close()
+                os.replace(f"{records_path}.part", records_path)
+        self.report(final=True)
+        return self.completed, self.failed
+
+    def _run(self, todo, records):
+        with open(self.done_path, "a", encoding="utf-8") as done_file, self.build_pipeline() as pipeline:
+            for item, out_path, error in pipeline.map(todo):
+                if error is not None:
+                    self._fail(item, error)
+                    continue
+                if records is not None:
+                    # Record history (tanpa blob) untuk digabung belakangan
+                    records.write(json.dumps({
+                        "input": item[0],
+                        "output": out_path,
+                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        "model_version": self.colorizer.version,
+                    }) + "\n")
+                    records.flush()
+                # Catat ke done-manifest agar job bisa dilanjutkan
+                done_file.write(item[1] + "\n")
+                done_file.flush()
+                self.completed += 1
+                if time.monotonic() - self._last_report >= self.report_interval:
+                    self.report()
+
+    def _fail(self, item, error):
+        self.failed += 1
+        print(f"{self.name}Gagal: {item[0]}: {error}", file=sys.stderr)
+
+    def report(self, final=False):
+        self._last_report = time.monotonic()
+        elapsed = self._last_report - self.start_time
+        throughput = self.completed / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.completed - self.failed
+        eta = remaining / throughput if throughput > 0 else float("inf")
+        status = "Selesai" if final else "Progress"
+        print(
+            f"{self.name}{status}: {self.completed}/{self.total} ({self.failed} gagal) • "
+            f"{throughput:.2f} img/s • ETA {eta:.0f} s"
+        )
+
+
+def parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def add_batch_arguments(parser):
+    parser.add_argument("inputs", nargs="*", help="Folder atau pola glob")
+    parser.add_argument("--manifest", help="File berisi satu path gambar per baris")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output-size", type=parse_size, default=None, help="Contoh: 512x512")
+    parser.add_argument("--mode", choices=["resize", "chroma"], default="resize")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--decode-workers", type=int, default=4)
+    parser.add_argument("--encode-workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=None)
+    return parser
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch colorization untuk folder, glob, atau manifest")
+    add_batch_arguments(parser)
+    parser.add_argument("--done-manifest", default=None)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    items = collect_inputs(args.inputs, args.manifest)
+    if not items:
+        print("Tidak ada gambar yang ditemukan", file=sys.stderr)
+        return 1
+
+    done_path = args.done_manifest or os.path.join(args.output_dir, DONE_MANIFEST)
+    try:
+        # Dicek sebelum memuat model
+        check_settings(done_path, job_settings(args.mode, args.output_size, model_version(args.model)))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    colorizer = Colorizer.from_path(args.model, max_batch_size=args.batch_size)
+    runner = BatchRunner(
+        colorizer, args.output_dir, output_size=args.output_size, mode=args.mode,
+        batch_size=args.batch_size, decode_workers=args.decode_workers,
+        encode_workers=args.encode_workers, queue_size=args.queue_size, done_path=done_path
+    )
+    _, failed = runner.run(items)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
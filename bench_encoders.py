@@ -0,0 +1,55 @@
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from encoders import OUTPUT_FORMATS, encode_image
+
+# ======================
+# Benchmark encoder output (waktu encode vs ukuran file)
+# ======================
+
+
+def sample_image(size, seed=0):
+    # Mirip hasil model: prediksi 256x256 yang di-upscale ke resolusi output
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (32, 32, 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize((256, 256), Image.BICUBIC)
+    return image.resize(size, Image.LANCZOS)
+
+
+def bench_formats(image, names, repeats=3):
+    results = []
+    for name in names:
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            data = encode_image(image, name)
+            best = min(best, time.perf_counter() - start)
+        results.append((name, best * 1000, len(data)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waktu encode dan ukuran file per format output")
+    parser.add_argument("--input", default=None, help="Gambar hasil colorization (default: gambar sintetis)")
+    parser.add_argument("--size", type=int, default=2048, help="Sisi gambar sintetis")
+    parser.add_argument("--formats", nargs="+", default=list(OUTPUT_FORMATS) + ["png-0", "png-9", "jpeg-90"])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.input:
+        image = Image.open(args.input).convert("RGB")
+    else:
+        image = sample_image((args.size, args.size))
+    raw_bytes = image.width * image.height * 3
+
+    print(f"{image.width}x{image.height}, raw {raw_bytes / 1e6:.1f} MB")
+    print(f"{'format':<18} {'encode ms':>10} {'size KB':>10} {'ratio':>7}")
+    for name, ms, size in bench_formats(image, args.formats, args.repeats):
+        print(f"{name:<18} {ms:>10.1f} {size / 1e3:>10.1f} {raw_bytes / size:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
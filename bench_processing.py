@@ -0,0 +1,77 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from colorizer import MODEL_INPUT_SIZE
+from processing import ImageProcessor
+
+# ======================
+# Microbenchmark preprocess/postprocess (waktu & alokasi per gambar)
+# ======================
+
+
+def legacy_preprocess_batch(images, input_size):
+    # Implementasi lama: convert + float32 / 255.0 per gambar, lalu disalin ke batch
+    batch = np.empty((len(images), input_size, input_size, 3), dtype=np.float32)
+    for i, image in enumerate(images):
+        img_resized = image.convert("RGB").resize((input_size, input_size))
+        batch[i] = np.asarray(img_resized, dtype=np.float32) / 255.0
+    return batch
+
+
+def legacy_postprocess(pred):
+    pred_clipped = np.clip(pred, 0, 1)
+    return Image.fromarray((pred_clipped * 255).astype(np.uint8))
+
+
+def measure(fn, repeats):
+    # Waktu terbaik dari beberapa ulangan + puncak alokasi numpy (tracemalloc)
+    fn()
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark preprocessing & postprocessing per batch size")
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    processor = ImageProcessor(MODEL_INPUT_SIZE)
+    rng = np.random.default_rng(0)
+
+    print(f"{'stage':<12} {'batch':>5} {'old ms/img':>11} {'new ms/img':>11} {'old peak MB':>12} {'new peak MB':>12}")
+    for batch_size in args.batch_sizes:
+        images = [Image.effect_noise((args.image_size, args.image_size), 64) for _ in range(batch_size)]
+        preds = rng.uniform(-0.1, 1.1, (batch_size, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3)).astype(np.float32)
+        stages = (
+            ("preprocess",
+             lambda: legacy_preprocess_batch(images, MODEL_INPUT_SIZE),
+             lambda: processor.preprocess_batch(images, reuse=True)),
+            ("postprocess",
+             lambda: [legacy_postprocess(pred) for pred in preds],
+             lambda: [processor.postprocess(pred) for pred in preds]),
+        )
+        for name, old_fn, new_fn in stages:
+            old_time, old_peak = measure(old_fn, args.repeats)
+            new_time, new_peak = measure(new_fn, args.repeats)
+            print(
+                f"{name:<12} {batch_size:>5} {old_time * 1000 / batch_size:>11.3f} {new_time * 1000 / batch_size:>11.3f} "
+                f"{old_peak / 1e6:>12.2f} {new_peak / 1e6:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import glob
+import os
+import time
+
+from PIL import Image
+
+from colorizer import MODEL_PATH, Colorizer
+
+# ======================
+# Benchmark Throughput (images/sec per batch size)
+# ======================
+
+
+def load_inputs(input_dir, num_images, size):
+    if input_dir:
+        paths = sorted(glob.glob(os.path.join(input_dir, "*")))[:num_images]
+        images = [Image.open(path).convert("RGB") for path in paths]
+    else:
+        images = []
+    # Lengkapi dengan gambar grayscale sintetis jika input kurang
+    while len(images) < num_images:
+        images.append(Image.effect_noise((size, size), 64).convert("RGB"))
+    return images
+
+
+def bench_batch_sizes(colorizer, images, batch_sizes, repeats=3):
+    results = []
+    # Warmup agar graph building tidak ikut terukur
+    colorizer.colorize_batch(images[:1])
+    for batch_size in batch_sizes:
+        colorizer.max_batch_size = batch_size
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            colorizer.colorize_batch(images)
+            best = min(best, time.perf_counter() - start)
+        results.append((batch_size, len(images) / best))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput colorization per batch size")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--input-dir", default=None, help="Folder gambar (default: gambar sintetis)")
+    parser.add_argument("--num-images", type=int, default=64)
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    colorizer = Colorizer.from_path(args.model)
+    images = load_inputs(args.input_dir, args.num_images, args.image_size)
+
+    print(f"{'batch':>6} {'images/sec':>12}")
+    for batch_size, throughput in bench_batch_sizes(colorizer, images, args.batch_sizes, args.repeats):
+        print(f"{batch_size:>6} {throughput:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
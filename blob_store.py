@@ -0,0 +1,56 @@
+import glob
+import mmap
+import os
+import shutil
+import threading
+
+
+# ======================
+# Blob Store (satu file per hash)
+# ======================
+class BlobStore:
+    # Blob content-addressed (nama file = hash), jadi tulis ulang dengan hash yang
+    # sama tidak mengubah apa pun dan banyak proses aman menulis bersamaan.
+    # get() mengembalikan bytes (untuk st.image / download); open() memberi mmap
+    # untuk pembaca yang hanya men-decode isi file (mis. pembuatan thumbnail).
+
+    def __init__(self, blob_dir):
+        self.blob_dir = blob_dir
+        os.makedirs(blob_dir, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def put(self, digest, data):
+        path = self.path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return True
+
+    def open(self, digest):
+        # Zero-copy: mmap read-only (mendukung buffer protocol dan read/seek)
+        try:
+            with open(self.path(digest), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+    def get(self, digest):
+        try:
+            with open(self.path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.blob_dir, "*")):
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
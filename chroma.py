@@ -0,0 +1,52 @@
+import numpy as np
+from PIL import Image
+
+# Koefisien YCbCr full-range (ITU-R BT.601, sama seperti JPEG dan PIL "L")
+_RGB_TO_YCBCR = np.array([
+    [0.299, 0.587, 0.114],
+    [-0.168736, -0.331264, 0.5],
+    [0.5, -0.418688, -0.081312],
+], dtype=np.float32)
+_YCBCR_TO_RGB = np.linalg.inv(_RGB_TO_YCBCR).astype(np.float32)
+
+
+# ======================
+# Konversi Warna (vectorized)
+# ======================
+def rgb_to_ycbcr(rgb):
+    # rgb: (..., 3) float 0..1 -> Y 0..1, Cb/Cr -0.5..0.5
+    return rgb @ _RGB_TO_YCBCR.T
+
+
+def ycbcr_to_rgb(ycbcr):
+    return ycbcr @ _YCBCR_TO_RGB.T
+
+
+def _resize_channel(channel, size):
+    return np.asarray(Image.fromarray(channel, mode="F").resize(size, Image.BILINEAR))
+
+
+# ======================
+# Chroma Transfer
+# ======================
+def transfer_chroma(pred, original_image, output_size=None):
+    # Ambil warna (Cb/Cr) dari prediksi 256px, luminance dari gambar asli
+    original_image = original_image.convert("L")
+    if output_size is None:
+        output_size = original_image.size
+    elif original_image.size != tuple(output_size):
+        original_image = original_image.resize(output_size, Image.LANCZOS)
+
+    luma = np.asarray(original_image, dtype=np.float32) / 255.0
+    ycbcr = rgb_to_ycbcr(np.clip(pred, 0, 1).astype(np.float32, copy=False))
+
+    # Hanya channel chroma yang di-upsample
+    result = np.empty(luma.shape + (3,), dtype=np.float32)
+    result[..., 0] = luma
+    result[..., 1] = _resize_channel(np.ascontiguousarray(ycbcr[..., 1]), output_size)
+    result[..., 2] = _resize_channel(np.ascontiguousarray(ycbcr[..., 2]), output_size)
+
+    rgb = ycbcr_to_rgb(result)
+    np.clip(rgb, 0, 1, out=rgb)
+    rgb *= 255
+    return Image.fromarray(rgb.round().astype(np.uint8))
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+
+from processing import ImageProcessor
+
+# Definisikan path dan nama konstanta
+MODEL_PATH = "best_generator.h5"
+MODEL_INPUT_SIZE = 256
+MAX_BATCH_SIZE = 16
+
+
+# ======================
+# Muat Model
+# ======================
+def load_colorization_model(model_path=MODEL_PATH):
+    # Import TensorFlow di sini agar modul ini tetap ringan untuk di-import
+    from tensorflow.keras.models import load_model
+
+    return load_model(model_path, compile=False)
+
+
+def model_version(model_path=MODEL_PATH):
+    # Versi murah dari metadata file: berubah setiap checkpoint diganti
+    stat = os.stat(model_path)
+    return f"{os.path.basename(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+# ======================
+# Engine Colorization (tanpa Streamlit)
+# ======================
+class Colorizer:
+    def __init__(self, model, input_size=MODEL_INPUT_SIZE, max_batch_size=MAX_BATCH_SIZE, version=None):
+        self.model = model
+        self.input_size = input_size
+        self.max_batch_size = max_batch_size
+        self.version = version
+        self.processor = ImageProcessor(input_size)
+
+    @classmethod
+    def from_path(cls, model_path=MODEL_PATH, **kwargs):
+        kwargs.setdefault("version", model_version(model_path))
+        return cls(load_colorization_model(model_path), **kwargs)
+
+    def preprocess(self, image):
+        return self.processor.preprocess(image)
+
+    def preprocess_batch(self, images):
+        # Satu tensor float32 (N, size, size, 3) untuk seluruh batch
+        return self.processor.preprocess_batch(images)
+
+    def postprocess(self, pred, output_size=None):
+        return self.processor.postprocess(pred, output_size)
+
+    def colorize_array(self, img_array):
+        # img_array: (H, W, 3) atau (N, H, W, 3) dengan nilai 0..1
+        img_array = np.asarray(img_array)
+        single = img_array.ndim == 3
+        if single:
+            img_array = np.expand_dims(img_array, axis=0)
+        pred_array = self.predict_batch(img_array)
+        return pred_array[0] if single else pred_array
+
+    def predict_batch(self, batch):
+        # Forward pass per chunk agar memori dibatasi oleh max_batch_size
+        batch = np.asarray(batch, dtype=np.float32)
+        preds = []
+        for start in range(0, len(batch), self.max_batch_size):
+            chunk = batch[start:start + self.max_batch_size]
+            preds.append(self.model.predict(chunk, batch_size=len(chunk), verbose=0))
+        return np.concatenate(preds)
+
+    def colorize(self, image, output_size=None):
+        pred = self.colorize_array(self.preprocess(image))
+        return self.postprocess(pred, output_size)
+
+    def colorize_batch(self, images, output_size=None):
+        images = list(images)
+        if not images:
+            return []
+        # Buffer batch dipakai ulang: hanya hidup selama forward pass ini
+        preds = self.predict_batch(self.processor.preprocess_batch(images, reuse=True))
+        return [self.postprocess(pred, output_size) for pred in preds]
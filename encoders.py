@@ -0,0 +1,46 @@
+import io
+import os
+
+# nama -> (format PIL, opsi save, mime, ekstensi file, label)
+OUTPUT_FORMATS = {
+    "png": ("PNG", {"compress_level": 6}, "image/png", "png", "PNG"),
+    # zlib level 1: jauh lebih cepat, file sedikit lebih besar
+    "png-fast": ("PNG", {"compress_level": 1}, "image/png", "png", "PNG (cepat)"),
+    # method 0 = encoder WebP lossless tercepat
+    "webp-lossless": ("WEBP", {"lossless": True, "quality": 0, "method": 0}, "image/webp", "webp", "WebP lossless"),
+    "jpeg": ("JPEG", {"quality": 95}, "image/jpeg", "jpg", "JPG"),
+    "jpeg-progressive": ("JPEG", {"quality": 95, "progressive": True}, "image/jpeg", "jpg", "JPG progressive"),
+}
+
+# Format penyimpanan history / result cache per deployment
+HISTORY_FORMAT = os.environ.get("COLORIZE_HISTORY_FORMAT", "png")
+# "jpeg-90": kualitas lebih rendah = file lebih kecil; waktu encode hampir sama dengan "jpeg"
+DOWNLOAD_FORMATS = ("png", "png-fast", "webp-lossless", "jpeg", "jpeg-90", "jpeg-progressive")
+
+
+def output_format(name):
+    # "png-<0..9>" memilih level zlib secara langsung
+    if name.startswith("png-") and name[4:].isdigit():
+        level = int(name[4:])
+        if not 0 <= level <= 9:
+            raise ValueError(f"Level kompresi PNG harus 0..9: {level}")
+        return ("PNG", {"compress_level": level}, "image/png", "png", f"PNG (level {level})")
+    # "jpeg-<1..95>" memilih kualitas JPEG
+    if name.startswith("jpeg-") and name[5:].isdigit():
+        quality = int(name[5:])
+        if not 1 <= quality <= 95:
+            raise ValueError(f"Kualitas JPEG harus 1..95: {quality}")
+        return ("JPEG", {"quality": quality}, "image/jpeg", "jpg", f"JPG (kualitas {quality})")
+    try:
+        return OUTPUT_FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Format output tidak dikenal: {name} (pilihan: {', '.join(OUTPUT_FORMATS)})") from None
+
+
+def encode_image(image, name):
+    pil_format, options, _, _, _ = output_format(name)
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buf = io.BytesIO()
+    image.save(buf, format=pil_format, **options)
+    return buf.getvalue()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from backends import BACKENDS, EXPORTERS, KerasBackend, artifact_path, open_backend
+from colorizer import MODEL_PATH, MODEL_INPUT_SIZE, load_colorization_model
+
+# ======================
+# Export backend + parity check + perbandingan latency
+# ======================
+
+
+def sample_batch(batch_size, input_size=MODEL_INPUT_SIZE, seed=0):
+    # Gambar grayscale acak dalam format RGB 0..1 seperti hasil preprocess
+    rng = np.random.default_rng(seed)
+    gray = rng.random((batch_size, input_size, input_size, 1), dtype=np.float32)
+    return np.repeat(gray, 3, axis=-1)
+
+
+def parity(reference, backend, batch):
+    expected = reference.predict(batch, batch_size=len(batch), verbose=0)
+    actual = backend.predict(batch, batch_size=len(batch), verbose=0)
+    diff = np.abs(np.asarray(expected) - np.asarray(actual))
+    return float(diff.max()), float(diff.mean())
+
+
+def latency_ms(backend, batch, repeats=20):
+    # Warmup dulu agar tracing / alokasi tensor tidak ikut terukur
+    backend.predict(batch, batch_size=len(batch), verbose=0)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.predict(batch, batch_size=len(batch), verbose=0)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export generator ke backend teroptimasi dan bandingkan hasilnya")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["savedmodel", "tflite"])
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="Batas max abs diff terhadap Keras")
+    parser.add_argument("--force", action="store_true", help="Export ulang meskipun artefak sudah ada")
+    args = parser.parse_args()
+
+    model = load_colorization_model(args.model)
+    # Referensi: model.predict murni; baris keras-fn mengukur fast path tf.function
+    reference = KerasBackend(model, fast_path_max_batch=0)
+    batch = sample_batch(args.batch_size)
+
+    print(f"{'backend':<12} {'latency ms':>11} {'max diff':>10} {'mean diff':>10}  status")
+    print(f"{'keras':<12} {latency_ms(reference, batch, args.repeats):>11.2f} {0.0:>10.2e} {0.0:>10.2e}  ref")
+    fast = KerasBackend(model)
+    max_diff, mean_diff = parity(reference, fast, batch)
+    print(f"{'keras-fn':<12} {latency_ms(fast, batch, args.repeats):>11.2f} {max_diff:>10.2e} {mean_diff:>10.2e}  fast path")
+    failed = False
+    for kind in args.backends:
+        if kind == "keras":
+            continue
+        path = artifact_path(kind, args.model)
+        try:
+            if args.force or not os.path.exists(path):
+                EXPORTERS[kind](model, path)
+            backend = open_backend(kind, path)
+        except ImportError as e:
+            print(f"{kind:<12} {'-':>11} {'-':>10} {'-':>10}  dilewati ({e})")
+            continue
+        max_diff, mean_diff = parity(reference, backend, batch)
+        status = "OK" if max_diff <= args.tolerance else "BEDA"
+        failed = failed or status != "OK"
+        print(f"{kind:<12} {latency_ms(backend, batch, args.repeats):>11.2f} {max_diff:>10.2e} {mean_diff:>10.2e}  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
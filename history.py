@@ -0,0 +1,481 @@
+import hashlib
+import io
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+from PIL import Image
+
+from blob_store import BlobStore
+
+DB_NAME = "colorization_history.db"
+PAGE_SIZE = 5
+THUMBNAIL_SIZE = 320
+THUMBNAIL_QUALITY = 80
+POOL_SIZE = 4
+WRITE_BATCH_SIZE = 32
+
+logger = logging.getLogger(__name__)
+
+# Pragma untuk banyak session yang membaca bersamaan dengan satu penulis
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+)
+
+# SQL yang sama dipakai ulang agar statement cache sqlite3 (prepared statement) terpakai
+INSERT_BLOB_SQL = "INSERT OR IGNORE INTO blob_files (hash, size) VALUES (?, ?)"
+INSERT_ENTRY_SQL = (
+    "INSERT INTO history_entries "
+    "(timestamp, original_hash, colorized_hash, original_thumb_hash, colorized_thumb_hash, latency_ms, model_version) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Counter dijaga oleh trigger sehingga statistik tidak perlu scan tabel
+STATS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS history_entries_stats_insert AFTER INSERT ON history_entries BEGIN
+        UPDATE history_stats SET
+            entry_count = entry_count + 1,
+            latency_count = latency_count + (NEW.latency_ms IS NOT NULL),
+            latency_total_ms = latency_total_ms + COALESCE(NEW.latency_ms, 0)
+        WHERE id = 1;
+        INSERT INTO history_daily (day, entry_count) VALUES (substr(NEW.timestamp, 1, 10), 1)
+            ON CONFLICT (day) DO UPDATE SET entry_count = entry_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_entries_stats_delete AFTER DELETE ON history_entries BEGIN
+        UPDATE history_stats SET
+            entry_count = entry_count - 1,
+            latency_count = latency_count - (OLD.latency_ms IS NOT NULL),
+            latency_total_ms = latency_total_ms - COALESCE(OLD.latency_ms, 0)
+        WHERE id = 1;
+        UPDATE history_daily SET entry_count = entry_count - 1 WHERE day = substr(OLD.timestamp, 1, 10);
+        DELETE FROM history_daily WHERE day = substr(OLD.timestamp, 1, 10) AND entry_count <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blob_files_stats_insert AFTER INSERT ON blob_files BEGIN
+        UPDATE history_stats SET blob_bytes = blob_bytes + NEW.size WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blob_files_stats_delete AFTER DELETE ON blob_files BEGIN
+        UPDATE history_stats SET blob_bytes = blob_bytes - OLD.size WHERE id = 1;
+    END
+    """,
+)
+
+HistoryStats = namedtuple("HistoryStats", ["count", "avg_latency_ms", "total_bytes"])
+
+HistoryEntry = namedtuple(
+    "HistoryEntry",
+    [
+        "id", "timestamp", "original_hash", "colorized_hash", "original_thumb_hash", "colorized_thumb_hash",
+        "model_version",
+    ]
+)
+
+
+def blob_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE, quality=THUMBNAIL_QUALITY):
+    # data: bytes atau mmap dari BlobStore (dibaca langsung tanpa salinan)
+    image = Image.open(data if hasattr(data, "read") else io.BytesIO(data))
+    # JPEG besar cukup di-decode pada skala yang mendekati ukuran thumbnail
+    image.draft("RGB", (size, size))
+    image = image.convert("RGB")
+    image.thumbnail((size, size))
+    buf = io.BytesIO()
+    try:
+        image.save(buf, format="WEBP", quality=quality)
+    except (KeyError, OSError):
+        # Pillow tanpa dukungan WebP
+        buf = io.BytesIO()
+        image.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+# ======================
+# Connection Pool
+# ======================
+class ConnectionPool:
+    def __init__(self, db_path, size=POOL_SIZE, timeout=5.0):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._connections = []
+        self._lock = threading.Lock()
+        self._size = size
+
+    def _create(self):
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.timeout, check_same_thread=False, cached_statements=256
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._connections) < self._size:
+                conn = self._create()
+                self._connections.append(conn)
+                return conn
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._idle = queue.LifoQueue(maxsize=self._size)
+
+
+# ======================
+# History Store (metadata + blob terpisah)
+# ======================
+class HistoryStore:
+    # Tabel history_entries hanya berisi metadata; gambar disimpan sekali
+    # per hash sebagai file di BlobStore (indeks + ukuran di tabel blob_files)
+    # dan baru dibaca saat benar-benar ditampilkan.
+
+    def __init__(self, db_path=DB_NAME, pool_size=POOL_SIZE, background_writes=False, blob_dir=None):
+        self.db_path = db_path
+        self.blobs = BlobStore(blob_dir or f"{os.path.splitext(db_path)[0]}_blobs")
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.init_db()
+        self.writer = HistoryWriter(self) if background_writes else None
+
+    def _connect(self):
+        return self.pool.connection()
+
+    def init_db(self):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS history_entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    original_hash TEXT NOT NULL,
+                    colorized_hash TEXT NOT NULL,
+                    original_thumb_hash TEXT,
+                    colorized_thumb_hash TEXT,
+                    latency_ms REAL,
+                    model_version TEXT
+                )
+            """)
+            self._add_missing_columns(cursor)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_entries_timestamp ON history_entries (timestamp)")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS blob_files (
+                    hash TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL
+                )
+            """)
+            # Posisi proses impor (mis. offset file record shard) yang sudah di-commit
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS history_checkpoints (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            self._init_stats(cursor)
+            self._migrate_legacy(conn, cursor)
+            self._migrate_blob_table(conn, cursor)
+
+    def _add_missing_columns(self, cursor):
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(history_entries)")}
+        for column, column_type in (
+            ("original_thumb_hash", "TEXT"), ("colorized_thumb_hash", "TEXT"), ("latency_ms", "REAL"),
+            ("model_version", "TEXT")
+        ):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE history_entries ADD COLUMN {column} {column_type}")
+
+    def _init_stats(self, cursor):
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS history_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                entry_count INTEGER NOT NULL,
+                latency_count INTEGER NOT NULL,
+                latency_total_ms REAL NOT NULL,
+                blob_bytes INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS history_daily (
+                day TEXT PRIMARY KEY,
+                entry_count INTEGER NOT NULL
+            )
+        """)
+        if cursor.execute("SELECT 1 FROM history_stats WHERE id = 1").fetchone() is None:
+            # Sekali saja: isi counter dari data yang sudah ada
+            cursor.execute("""
+                INSERT INTO history_stats (id, entry_count, latency_count, latency_total_ms, blob_bytes)
+                SELECT 1,
+                    (SELECT COUNT(*) FROM history_entries),
+                    (SELECT COUNT(latency_ms) FROM history_entries),
+                    (SELECT COALESCE(SUM(latency_ms), 0) FROM history_entries),
+                    (SELECT COALESCE(SUM(size), 0) FROM blob_files)
+            """)
+            cursor.execute("DELETE FROM history_daily")
+            cursor.execute("""
+                INSERT INTO history_daily (day, entry_count)
+                SELECT substr(timestamp, 1, 10), COUNT(*) FROM history_entries GROUP BY substr(timestamp, 1, 10)
+            """)
+        for trigger in STATS_TRIGGERS:
+            cursor.execute(trigger)
+
+    def _migrate_legacy(self, conn, cursor):
+        # Database lama menyimpan BLOB langsung di tabel history
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'history'")
+        if cursor.fetchone() is None:
+            return
+        # Dipindah baris per baris: hanya satu pasang gambar di memori pada satu waktu
+        while True:
+            row = conn.execute(
+                "SELECT id, timestamp, original_image, colorized_image FROM history ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            entry_id, timestamp, original_bytes, colorized_bytes = row
+            original_hash = self._put_blob(cursor, original_bytes)
+            colorized_hash = self._put_blob(cursor, colorized_bytes)
+            cursor.execute(
+                "INSERT INTO history_entries (id, timestamp, original_hash, colorized_hash) VALUES (?, ?, ?, ?)",
+                (entry_id, timestamp, original_hash, colorized_hash)
+            )
+            # DROP tabel besar dalam satu transaksi menahan semua halaman yang dibebaskan
+            # di statement journal (temp_store = MEMORY); hapus per baris agar tetap kecil
+            cursor.execute("DELETE FROM history WHERE id = ?", (entry_id,))
+        cursor.execute("DROP TABLE history")
+
+    def _migrate_blob_table(self, conn, cursor):
+        # Database lama menyimpan blob di tabel blobs: pindahkan ke file satu per satu
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'blobs'")
+        if cursor.fetchone() is None:
+            return
+        for digest, data in conn.execute("SELECT hash, data FROM blobs"):
+            self.blobs.put(digest, data)
+            cursor.execute(INSERT_BLOB_SQL, (digest, len(data)))
+        # Trigger lama di tabel blobs mengurangi counter yang sudah dihitung ulang di atas
+        cursor.execute("DELETE FROM blobs")
+        cursor.execute("DROP TABLE blobs")
+
+    def _put_blob(self, cursor, data):
+        digest = blob_hash(data)
+        # File ditulis dulu; baris indeks baru terlihat setelah commit
+        self.blobs.put(digest, data)
+        cursor.execute(INSERT_BLOB_SQL, (digest, len(data)))
+        return digest
+
+    def _insert(self, cursor, timestamp, original_bytes, colorized_bytes, latency_ms=None, model_version=None):
+        # Thumbnail dibuat sekali saat insert, gallery tidak perlu blob penuh
+        original_thumb = make_thumbnail(original_bytes)
+        colorized_thumb = make_thumbnail(colorized_bytes)
+        cursor.execute(INSERT_ENTRY_SQL, (
+            timestamp,
+            self._put_blob(cursor, original_bytes), self._put_blob(cursor, colorized_bytes),
+            self._put_blob(cursor, original_thumb), self._put_blob(cursor, colorized_thumb),
+            latency_ms, model_version
+        ))
+        return cursor.lastrowid
+
+    def add(self, original_bytes, colorized_bytes, latency_ms=None, model_version=None):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as conn:
+            return self._insert(conn.cursor(), timestamp, original_bytes, colorized_bytes, latency_ms, model_version)
+
+    def add_many(self, items, checkpoint=None):
+        # items: iterable (timestamp, original_bytes, colorized_bytes[, latency_ms[, model_version]]), satu transaksi
+        # checkpoint: (nama, nilai) ikut di-commit dalam transaksi yang sama
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            ids = [self._insert(cursor, *item) for item in items]
+            if checkpoint is not None:
+                cursor.execute(
+                    "INSERT INTO history_checkpoints (name, value) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                    checkpoint
+                )
+            return ids
+
+    def checkpoint(self, name, default=0):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM history_checkpoints WHERE name = ?", (name,)).fetchone()
+        return default if row is None else row[0]
+
+    def submit(self, original_bytes, colorized_bytes, latency_ms=None, model_version=None):
+        # Tanpa menunggu commit jika background writer aktif
+        if self.writer is None:
+            self.add(original_bytes, colorized_bytes, latency_ms, model_version)
+        else:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.writer.put((timestamp, original_bytes, colorized_bytes, latency_ms, model_version))
+
+    def flush(self):
+        if self.writer is not None:
+            self.writer.flush()
+
+    def write_errors(self):
+        # (jumlah entri gagal, error terakhir) dari background writer
+        if self.writer is None:
+            return 0, None
+        return self.writer.failed, self.writer.last_error
+
+    def list_entries(self, limit=PAGE_SIZE, offset=0):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, timestamp, original_hash, colorized_hash, original_thumb_hash, colorized_thumb_hash, "
+                "model_version FROM history_entries ORDER BY id DESC LIMIT ? OFFSET ?",
+                (limit, offset)
+            )
+            return [HistoryEntry(*row) for row in cursor.fetchall()]
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT entry_count FROM history_stats WHERE id = 1").fetchone()[0]
+
+    def stats(self):
+        with self._connect() as conn:
+            count, latency_count, latency_total_ms, blob_bytes = conn.execute(
+                "SELECT entry_count, latency_count, latency_total_ms, blob_bytes FROM history_stats WHERE id = 1"
+            ).fetchone()
+        avg_latency_ms = latency_total_ms / latency_count if latency_count else None
+        return HistoryStats(count, avg_latency_ms, blob_bytes)
+
+    def daily_counts(self, days=30):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT day, entry_count FROM history_daily ORDER BY day DESC LIMIT ?", (days,)
+            ).fetchall()
+        return rows[::-1]
+
+    def get_blob(self, digest):
+        return self.blobs.get(digest)
+
+    def open_blob(self, digest):
+        # mmap read-only tanpa salinan; tutup setelah dipakai
+        return self.blobs.open(digest)
+
+    def get_thumbnail(self, entry, colorized=False):
+        thumb_hash = entry.colorized_thumb_hash if colorized else entry.original_thumb_hash
+        if thumb_hash is not None:
+            return self.get_blob(thumb_hash)
+        # Entri lama tanpa thumbnail: buat sekarang dan simpan untuk berikutnya
+        column = "colorized_thumb_hash" if colorized else "original_thumb_hash"
+        mapped = self.open_blob(entry.colorized_hash if colorized else entry.original_hash)
+        if mapped is None:
+            # File blob hilang / kosong (mis. history baru dihapus proses lain)
+            return None
+        with mapped:
+            thumb = make_thumbnail(mapped)
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE history_entries SET {column} = ? WHERE id = ?",
+                (self._put_blob(cursor, thumb), entry.id)
+            )
+        return thumb
+
+    def clear(self):
+        self.flush()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM history_entries")
+            cursor.execute("DELETE FROM blob_files")
+        self.blobs.clear()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.pool.close()
+
+
+# ======================
+# Background Writer (insert di-batch dalam satu transaksi)
+# ======================
+class HistoryWriter:
+    def __init__(self, store, batch_size=WRITE_BATCH_SIZE):
+        self.store = store
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        # Entri yang gagal disimpan (ditampilkan di UI, detail di log)
+        self.failed = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _write(self, batch):
+        try:
+            self.store.add_many(batch)
+            return
+        except Exception as e:
+            if len(batch) > 1:
+                logger.warning("Batch history gagal (%s), diulang per entri", e)
+        # Satu entri rusak tidak boleh membatalkan entri lain di transaksi yang sama
+        for item in batch:
+            try:
+                self.store.add_many([item])
+            except Exception as e:
+                self.failed += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("Gagal menyimpan entri history (%s)", item[0])
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in items
+            batch = [item for item in items if item is not None]
+            try:
+                if batch:
+                    self._write(batch)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if stop:
+                return
@@ -0,0 +1,189 @@
+import glob
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+STORE_DIR = "image_store"
+STORE_BUDGET_BYTES = 512 * 1024 * 1024
+STORE_DISK_BUDGET_BYTES = 4 * 1024 * 1024 * 1024
+# File spill yang tidak disentuh selama ini dihapus (saat store dibuat dan secara berkala)
+SPILL_TTL_SECONDS = 24 * 60 * 60
+PRUNE_INTERVAL_SECONDS = 10 * 60
+# Setelah budget disk terlampaui, hapus file tertua sampai tersisa 90% budget
+DISK_PRUNE_RATIO = 0.9
+
+
+def content_hash(data):
+    # data: bytes atau memoryview (tanpa menyalin buffer upload)
+    return hashlib.sha256(data).hexdigest()
+
+
+# ======================
+# Image Store (memory LRU + spill ke disk saat dievict)
+# ======================
+class ImageStore:
+    # Dipakai bersama oleh semua session: session hanya menyimpan kunci.
+    # Nilai: bytes, PIL Image atau numpy array. Entri yang keluar dari budget
+    # memori ditulis ke disk dan dimuat kembali saat diminta.
+
+    def __init__(self, store_dir=STORE_DIR, memory_budget=STORE_BUDGET_BYTES, spill_ttl=SPILL_TTL_SECONDS,
+                 disk_budget=STORE_DISK_BUDGET_BYTES):
+        self.store_dir = store_dir
+        self.memory_budget = memory_budget
+        self.spill_ttl = spill_ttl
+        self.disk_budget = disk_budget
+        self._entries = OrderedDict()
+        # Entri yang sudah keluar dari LRU tapi file spill-nya belum selesai ditulis
+        self._spilling = {}
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+        self.prune()
+
+    def _path(self, key, value_type):
+        return os.path.join(self.store_dir, key[:2], f"{key}.{value_type}")
+
+    def _sizeof(self, value):
+        if isinstance(value, Image.Image):
+            return value.width * value.height * len(value.getbands())
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        return len(value)
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= self._sizeof(old)
+            self._entries[key] = value
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_budget and len(self._entries) > 1:
+                evicted_key, evicted_value = self._entries.popitem(last=False)
+                self._memory_bytes -= self._sizeof(evicted_value)
+                # Tetap terlihat oleh get / __contains__ sampai file spill ada
+                self._spilling[evicted_key] = evicted_value
+                evicted.append((evicted_key, evicted_value))
+        # Tulis ke disk di luar lock
+        written = 0
+        for evicted_key, evicted_value in evicted:
+            try:
+                written += self._spill(evicted_key, evicted_value)
+            finally:
+                with self._lock:
+                    if self._spilling.get(evicted_key) is evicted_value:
+                        del self._spilling[evicted_key]
+        if written:
+            with self._lock:
+                self._disk_bytes += written
+                due = (
+                    self._disk_bytes > self.disk_budget
+                    or time.monotonic() - self._last_prune >= PRUNE_INTERVAL_SECONDS
+                )
+            if due:
+                self.prune()
+        return key
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+            value = self._spilling.get(key)
+            if value is not None:
+                return value
+        value = self._load(key)
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries or key in self._spilling:
+                return True
+        return any(os.path.exists(self._path(key, value_type)) for value_type in ("bin", "img.npy", "npy"))
+
+    def _spill(self, key, value):
+        if isinstance(value, Image.Image):
+            value_type, data = "img.npy", np.asarray(value)
+        elif isinstance(value, np.ndarray):
+            value_type, data = "npy", value
+        else:
+            value_type, data = "bin", value
+        path = self._path(key, value_type)
+        if os.path.exists(path):
+            # Isi sama (kunci berbasis hash), cukup perbarui waktu akses
+            os.utime(path)
+            return 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            if value_type == "bin":
+                f.write(data)
+            else:
+                np.save(f, data)
+            size = f.tell()
+        os.replace(tmp_path, path)
+        return size
+
+    def _load(self, key):
+        for value_type in ("bin", "img.npy", "npy"):
+            path = self._path(key, value_type)
+            try:
+                if value_type == "bin":
+                    with open(path, "rb") as f:
+                        data = f.read()
+                else:
+                    data = np.load(path)
+                # mtime = waktu akses terakhir, dipakai untuk TTL dan urutan hapus di disk
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            return Image.fromarray(data) if value_type == "img.npy" else data
+        return None
+
+    def prune(self, max_age=None):
+        # Hapus file spill yang lebih tua dari TTL, lalu file tertua sampai di bawah budget disk.
+        # Pemakaian disk dihitung ulang dari direktori (bisa dipakai beberapa proses).
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            cutoff = time.time() - (self.spill_ttl if max_age is None else max_age)
+            files = []
+            for path in glob.glob(os.path.join(self.store_dir, "*", "*")):
+                if path.endswith(".tmp"):
+                    continue
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime < cutoff:
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            if total > self.disk_budget:
+                target = self.disk_budget * DISK_PRUNE_RATIO
+                for _, size, path in sorted(files):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+            with self._lock:
+                self._disk_bytes = total
+                self._last_prune = time.monotonic()
+        finally:
+            self._prune_lock.release()
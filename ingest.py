@@ -0,0 +1,48 @@
+import math
+
+from PIL import Image, ImageOps
+
+# Batas jumlah piksel (dari header, sebelum decode) melawan decompression bomb
+MAX_IMAGE_PIXELS = 64_000_000
+EXIF_ORIENTATION = 0x0112
+# Orientasi EXIF 5..8 memutar 90°: lebar dan tinggi tertukar
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def covering_size(size, cover_size):
+    # Ukuran terkecil (rasio tetap) yang masih menutupi cover_size, maksimal ukuran asli
+    width, height = size
+    scale = min(1.0, max(cover_size[0] / width, cover_size[1] / height))
+    return max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale))
+
+
+# ======================
+# Ingest Gambar (decode terbatas)
+# ======================
+def open_image(source, cover_size=None, max_pixels=MAX_IMAGE_PIXELS, mode="RGB"):
+    # source: path atau file-like. cover_size: resolusi yang benar-benar dibutuhkan
+    # (None = resolusi penuh). JPEG di-decode langsung pada skala 1/2, 1/4 atau 1/8.
+    try:
+        image = Image.open(source)
+    except Image.DecompressionBombError as e:
+        raise ValueError(f"Gambar terlalu besar: {e}") from e
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ValueError(
+            f"Gambar terlalu besar: {width}×{height} px ({width * height / 1e6:.0f} MP, batas {max_pixels / 1e6:.0f} MP)"
+        )
+
+    if cover_size is not None:
+        # Orientasi dibaca dari header EXIF yang sudah di-parse Image.open
+        if image.getexif().get(EXIF_ORIENTATION) in TRANSPOSED_ORIENTATIONS:
+            cover_size = (cover_size[1], cover_size[0])
+        target = covering_size(image.size, cover_size)
+        image.draft(None, target)
+        image.load()
+        # Format tanpa draft (PNG, dsb.): kecilkan dengan faktor bulat yang masih menutupi target
+        factor = min(image.width // target[0], image.height // target[1])
+        if factor >= 2:
+            image = image.reduce(factor)
+
+    ImageOps.exif_transpose(image, in_place=True)
+    return image.convert(mode) if image.mode != mode else image
@@ -0,0 +1,157 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+
+QUEUE_SIZE = 8
+MAX_WAIT_MS = 50
+
+_END = object()
+
+
+# ======================
+# Streaming Pipeline (stage + queue dengan backpressure)
+# ======================
+class Stage:
+    # batch_size: fn menerima list nilai dan mengembalikan list dengan panjang sama.
+    # max_wait_ms: batas tunggu batch yang belum penuh, sehingga sisa item di
+    # akhir stream tetap diproses.
+    def __init__(self, name, fn, workers=1, batch_size=None, max_wait_ms=MAX_WAIT_MS):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+
+def _resolve(future, result=None, error=None):
+    # Future bisa saja sudah dibatalkan oleh pemanggil
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class Pipeline:
+    # Setiap stage punya pool thread sendiri dan queue input yang dibatasi,
+    # sehingga decode item k+1 dan encode item k-1 berjalan bersamaan dengan
+    # inferensi item k, dan stage yang lambat menahan stage sebelumnya.
+
+    def __init__(self, stages, queue_size=QUEUE_SIZE):
+        self.stages = stages
+        self.queue_size = queue_size
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self._remaining = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = []
+        for index, stage in enumerate(stages):
+            for worker in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._run_stage, args=(index,), name=f"{stage.name}-{worker}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, item):
+        # Blok jika queue stage pertama penuh (backpressure ke pemanggil)
+        if self._closed:
+            raise RuntimeError("Pipeline sudah ditutup")
+        future = Future()
+        self._queues[0].put((future, item))
+        return future
+
+    def map(self, items, max_in_flight=None):
+        # Hasil: (item, result, error) sesuai urutan input
+        max_in_flight = max_in_flight or self.queue_size * (len(self.stages) + 1)
+        in_flight = deque()
+        for item in items:
+            in_flight.append((item, self.submit(item)))
+            while in_flight and (len(in_flight) >= max_in_flight or in_flight[0][1].done()):
+                yield self._pop(in_flight)
+        while in_flight:
+            yield self._pop(in_flight)
+
+    def _pop(self, in_flight):
+        item, future = in_flight.popleft()
+        try:
+            return item, future.result(), None
+        except Exception as e:
+            return item, None, e
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in range(self.stages[0].workers):
+            self._queues[0].put(_END)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _collect(self, stage, inbox):
+        work = inbox.get()
+        if work is _END:
+            return None, True
+        if not stage.batch_size:
+            return [work], False
+        batch = [work]
+        deadline = time.monotonic() + stage.max_wait
+        while len(batch) < stage.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                work = inbox.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if work is _END:
+                return batch, True
+            batch.append(work)
+        return batch, False
+
+    def _run_stage(self, index):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        last = index == len(self.stages) - 1
+        while True:
+            batch, ended = self._collect(stage, inbox)
+            if batch:
+                batch = [(future, value) for future, value in batch if not future.cancelled()]
+            if batch:
+                try:
+                    if stage.batch_size:
+                        results = stage.fn([value for _, value in batch])
+                    else:
+                        results = [stage.fn(batch[0][1])]
+                except Exception as e:
+                    for future, _ in batch:
+                        _resolve(future, error=e)
+                    results = None
+                if results is not None:
+                    for (future, _), result in zip(batch, results):
+                        if last:
+                            _resolve(future, result)
+                        else:
+                            self._queues[index + 1].put((future, result))
+            if ended:
+                self._finish_stage(index)
+                return
+
+    def _finish_stage(self, index):
+        # Worker terakhir yang selesai meneruskan sinyal berhenti ke stage berikutnya
+        with self._lock:
+            self._remaining[index] -= 1
+            done = self._remaining[index] == 0
+        if done and index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                self._queues[index + 1].put(_END)
@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+from PIL import Image
+
+# Dikalikan (bukan dibagi) agar hasil langsung float32 tanpa perantara float64
+INV_255 = np.float32(1.0 / 255.0)
+
+
+# ======================
+# Konversi uint8 <-> float32
+# ======================
+def to_float32(pixels, out=None):
+    # pixels: uint8 0..255 -> float32 0..1 dalam satu operasi
+    return np.multiply(pixels, INV_255, out=out, dtype=np.float32)
+
+
+def to_uint8(pred, out=None, scratch=None):
+    # pred: float32 0..1 -> uint8 0..255; clip dan scale in-place di scratch
+    scratch = np.multiply(pred, np.float32(255.0), out=scratch, dtype=np.float32)
+    np.clip(scratch, 0, 255, out=scratch)
+    if out is None:
+        return scratch.astype(np.uint8)
+    np.copyto(out, scratch, casting="unsafe")
+    return out
+
+
+# ======================
+# Buffer yang dipakai ulang (per thread)
+# ======================
+class BufferPool:
+    # Satu buffer datar per nama dan per thread yang hanya tumbuh, sehingga
+    # batch 1..N memakai memori yang sama. Isi buffer hanya valid sampai
+    # pemanggilan berikutnya di thread yang sama.
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, name, shape, dtype):
+        buffers = self._local.__dict__.setdefault("buffers", {})
+        size = int(np.prod(shape))
+        buffer = buffers.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.size < size:
+            buffer = buffers[name] = np.empty(size, dtype=dtype)
+        return buffer[:size].reshape(shape)
+
+
+# ======================
+# Preprocessing & Postprocessing
+# ======================
+class ImageProcessor:
+    def __init__(self, input_size):
+        self.input_size = input_size
+        self.buffers = BufferPool()
+
+    def preprocess(self, image, out=None):
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        img_resized = image.resize((self.input_size, self.input_size))
+        return to_float32(np.asarray(img_resized), out)
+
+    def preprocess_batch(self, images, reuse=False):
+        # reuse=True: hasil menimpa buffer thread ini, hanya untuk dipakai langsung
+        shape = (len(images), self.input_size, self.input_size, 3)
+        batch = self.buffers.get("batch", shape, np.float32) if reuse else np.empty(shape, dtype=np.float32)
+        for i, image in enumerate(images):
+            self.preprocess(image, out=batch[i])
+        return batch
+
+    def postprocess(self, pred, output_size=None):
+        pred = np.asarray(pred, dtype=np.float32)
+        pixels = to_uint8(
+            pred, self.buffers.get("pixels", pred.shape, np.uint8), self.buffers.get("scratch", pred.shape, np.float32)
+        )
+        # Image.fromarray menyalin data RGB, jadi buffer aman dipakai ulang
+        colorized_img = Image.fromarray(pixels)
+
+        # Resize to output dimensions
+        if output_size is not None:
+            colorized_img = colorized_img.resize(output_size, Image.LANCZOS)
+        return colorized_img
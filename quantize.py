@@ -0,0 +1,129 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+from PIL import Image
+
+from colorizer import MODEL_PATH, MODEL_INPUT_SIZE, Colorizer, load_colorization_model
+from ingest import open_image
+
+VARIANTS = ("float32", "dynamic", "float16", "int8")
+CALIBRATION_SAMPLES = 100
+
+
+# ======================
+# Dataset representatif (gambar grayscale seperti input pengguna)
+# ======================
+def load_calibration_images(calibration_dir, num_samples=CALIBRATION_SAMPLES, input_size=MODEL_INPUT_SIZE):
+    colorizer = Colorizer(None, input_size)
+    images = []
+    paths = sorted(glob.glob(os.path.join(calibration_dir, "**", "*"), recursive=True))
+    for path in paths:
+        if len(images) >= num_samples:
+            break
+        if not path.lower().endswith((".jpg", ".jpeg", ".png")):
+            continue
+        try:
+            images.append(colorizer.preprocess(open_image(path, (input_size, input_size), mode="L")))
+        except (OSError, ValueError):
+            # File rusak, atau melebihi batas piksel open_image
+            continue
+    if not images:
+        raise ValueError(f"Tidak ada gambar kalibrasi yang bisa dibaca di {calibration_dir}")
+    return np.stack(images)
+
+
+def synthetic_images(num_samples=CALIBRATION_SAMPLES, input_size=MODEL_INPUT_SIZE):
+    # Noise grayscale: cukup untuk cek export berjalan, bukan untuk kalibrasi / ukur kualitas
+    colorizer = Colorizer(None, input_size)
+    return np.stack([
+        colorizer.preprocess(Image.effect_noise((input_size, input_size), 64)) for _ in range(num_samples)
+    ])
+
+
+def representative_dataset(images):
+    def generate():
+        for image in images:
+            yield [image[np.newaxis]]
+    return generate
+
+
+# ======================
+# Export varian terkuantisasi (TFLite)
+# ======================
+def export_quantized(model, path, variant, calibration_images=None, input_size=MODEL_INPUT_SIZE):
+    import tensorflow as tf
+
+    from backends import export_tflite
+
+    if variant == "float32":
+        return export_tflite(model, path, input_size)
+    if variant == "dynamic":
+        # Bobot int8, aktivasi tetap float (dynamic range)
+        return export_tflite(model, path, input_size, optimizations=[tf.lite.Optimize.DEFAULT])
+    if variant == "float16":
+        return export_tflite(
+            model, path, input_size, optimizations=[tf.lite.Optimize.DEFAULT], supported_types=[tf.float16]
+        )
+    if variant == "int8":
+        # Aktivasi int8 dikalibrasi dengan dataset representatif; input/output tetap float32
+        if calibration_images is None:
+            raise ValueError("Varian int8 butuh gambar kalibrasi (quantize.py --calibration-dir)")
+        return export_tflite(
+            model, path, input_size, optimizations=[tf.lite.Optimize.DEFAULT],
+            representative_dataset=representative_dataset(calibration_images)
+        )
+    raise ValueError(f"Varian tidak dikenal: {variant} (pilihan: {', '.join(VARIANTS)})")
+
+
+# ======================
+# Kualitas terhadap output float32
+# ======================
+def quality_delta(reference, candidate):
+    from skimage.metrics import peak_signal_noise_ratio, structural_similarity
+
+    reference = np.clip(reference, 0, 1)
+    candidate = np.clip(candidate, 0, 1)
+    psnr = [peak_signal_noise_ratio(ref, cand, data_range=1.0) for ref, cand in zip(reference, candidate)]
+    ssim = [
+        structural_similarity(ref, cand, data_range=1.0, channel_axis=-1)
+        for ref, cand in zip(reference, candidate)
+    ]
+    return float(np.mean(psnr)), float(np.mean(ssim))
+
+
+def main():
+    from backends import artifact_path, open_backend
+
+    parser = argparse.ArgumentParser(description="Buat varian generator terkuantisasi dan ukur kualitasnya")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS[1:], default=["dynamic", "float16", "int8"])
+    parser.add_argument("--calibration-dir", default=None, help="Folder gambar grayscale untuk kalibrasi")
+    parser.add_argument("--num-samples", type=int, default=CALIBRATION_SAMPLES)
+    args = parser.parse_args()
+    if "int8" in args.variants and not args.calibration_dir:
+        parser.error("varian int8 butuh --calibration-dir (gambar grayscale representatif)")
+
+    model = load_colorization_model(args.model)
+    if args.calibration_dir:
+        images = load_calibration_images(args.calibration_dir, args.num_samples)
+        print(f"Kualitas diukur pada {len(images)} gambar dari {args.calibration_dir}")
+    else:
+        images = synthetic_images(args.num_samples)
+        print("PERINGATAN: tanpa --calibration-dir, PSNR/SSIM diukur pada noise sintetis (bukan laporan kualitas)")
+    reference = model.predict(images, verbose=0)
+
+    print(f"{'variant':<10} {'size MB':>8} {'PSNR dB':>8} {'SSIM':>7}")
+    print(f"{'float32':<10} {os.path.getsize(args.model) / 1e6:>8.2f} {'ref':>8} {'ref':>7}")
+    for variant in args.variants:
+        path = artifact_path("tflite", args.model, variant)
+        export_quantized(model, path, variant, images)
+        backend = open_backend("tflite", path)
+        candidate = np.concatenate([backend.predict(image[np.newaxis]) for image in images])
+        psnr, ssim = quality_delta(reference, candidate)
+        print(f"{variant:<10} {os.path.getsize(path) / 1e6:>8.2f} {psnr:>8.2f} {ssim:>7.4f}")
+
+
+if __name__ == "__main__":
+    main()
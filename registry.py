@@ -0,0 +1,103 @@
+import glob
+import os
+import threading
+from collections import OrderedDict
+
+from colorizer import MODEL_PATH, model_version
+
+# Folder checkpoint generator dan model default (nama file di folder tersebut)
+MODEL_DIR = os.environ.get("COLORIZE_MODEL_DIR", os.path.dirname(MODEL_PATH) or ".")
+DEFAULT_MODEL = os.environ.get("COLORIZE_MODEL", os.path.basename(MODEL_PATH))
+MODEL_PATTERNS = ("*.h5", "*.keras")
+MODEL_MEMORY_BUDGET = 1024 * 1024 * 1024
+
+
+def discover_models(model_dir=MODEL_DIR):
+    # nama file -> path, urut nama
+    paths = []
+    for pattern in MODEL_PATTERNS:
+        paths.extend(glob.glob(os.path.join(model_dir, pattern)))
+    return OrderedDict((os.path.basename(path), path) for path in sorted(paths))
+
+
+# ======================
+# Registry Model (load on demand + LRU dalam budget memori)
+# ======================
+class ModelRegistry:
+    # load_fn(path) mengembalikan Colorizer; warmup_fn(colorizer) dijalankan sekali
+    # setelah load sebelum model dipakai session lain.
+    # Model yang dikeluarkan dari registry tetap hidup selama masih dipegang
+    # request yang sedang berjalan, jadi eviction / hot swap tidak memutus request.
+
+    def __init__(self, load_fn, model_dir=MODEL_DIR, default=DEFAULT_MODEL, memory_budget=MODEL_MEMORY_BUDGET,
+                 warmup_fn=None):
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+        self.model_dir = model_dir
+        self.default = default
+        self.memory_budget = memory_budget
+        self._models = OrderedDict()  # nama -> (versi, colorizer, ukuran)
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def available(self):
+        return discover_models(self.model_dir)
+
+    def path_for(self, name):
+        path = self.available().get(name)
+        if path is None:
+            raise ValueError(f"Model tidak ditemukan: {name} (di {self.model_dir})")
+        return path
+
+    def resident(self):
+        with self._lock:
+            return list(self._models)
+
+    def get(self, name=None, warmup=True):
+        # warmup=False: pemanggil menjalankan warmup sendiri (mis. ModelLoader yang mencatat waktunya)
+        name = name or self.default
+        path = self.path_for(name)
+        # Checkpoint yang ditimpa (mtime/ukuran berubah) otomatis dimuat ulang
+        version = model_version(path)
+        cached = self._lookup(name, version)
+        if cached is not None:
+            return cached
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            # Session lain mungkin sudah memuat model yang sama
+            cached = self._lookup(name, version)
+            if cached is not None:
+                return cached
+            colorizer = self.load_fn(path)
+            if warmup and self.warmup_fn is not None:
+                self.warmup_fn(colorizer)
+            with self._lock:
+                self._models[name] = (version, colorizer, os.path.getsize(path))
+                self._models.move_to_end(name)
+                self._evict(keep=name)
+            return colorizer
+
+    def set_default(self, name):
+        # Muat + warmup dulu di luar lock, baru tukar default secara atomik
+        self.get(name)
+        with self._lock:
+            self.default = name
+
+    def _lookup(self, name, version):
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is None or entry[0] != version:
+                return None
+            self._models.move_to_end(name)
+            return entry[1]
+
+    def _evict(self, keep):
+        # Ukuran model diperkirakan dari ukuran checkpoint (bobot)
+        total = sum(size for _, _, size in self._models.values())
+        for name in list(self._models):
+            if total <= self.memory_budget:
+                break
+            if name in (keep, self.default):
+                continue
+            total -= self._models.pop(name)[2]
@@ -0,0 +1,147 @@
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = "colorization_cache"
+MEMORY_BUDGET_BYTES = 256 * 1024 * 1024
+PREDICTION_BUDGET_BYTES = 128 * 1024 * 1024
+DISK_BUDGET_BYTES = 2 * 1024 * 1024 * 1024
+# Setelah budget disk terlampaui, hapus file tertua sampai tersisa 90% budget
+DISK_PRUNE_RATIO = 0.9
+
+
+def cache_key(image_bytes, model_version, output_size, mode=""):
+    # Hash isi gambar + versi model + pengaturan output
+    digest = hashlib.sha256(image_bytes)
+    digest.update(f"|{model_version}|{output_size[0]}x{output_size[1]}|{mode}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def prediction_key(image_bytes, model_version):
+    # Prediksi mentah tidak bergantung pada ukuran output
+    digest = hashlib.sha256(image_bytes)
+    digest.update(f"|{model_version}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# ======================
+# Result Cache (memory LRU + disk LRU berbasis mtime)
+# ======================
+class ResultCache:
+    def __init__(self, cache_dir=CACHE_DIR, memory_budget=MEMORY_BUDGET_BYTES, disk_budget=DISK_BUDGET_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.prune_disk()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime = waktu akses terakhir, dipakai sebagai urutan LRU di disk
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_bytes += len(data)
+            over_budget = self._disk_bytes > self.disk_budget
+        if over_budget:
+            self.prune_disk()
+
+    def prune_disk(self):
+        # Hitung ulang pemakaian disk (proses lain ikut menulis ke direktori yang sama)
+        # lalu hapus file yang paling lama tidak diakses sampai di bawah budget
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            files = []
+            for path in glob.glob(os.path.join(self.cache_dir, "*", "*")):
+                if path.endswith(".tmp"):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            if total > self.disk_budget:
+                target = self.disk_budget * DISK_PRUNE_RATIO
+                for _, size, path in sorted(files):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+            with self._lock:
+                self._disk_bytes = total
+        finally:
+            self._prune_lock.release()
+
+    def _sizeof(self, data):
+        return len(data)
+
+    def _remember(self, key, data):
+        size = self._sizeof(data)
+        if size > self.memory_budget:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= self._sizeof(old)
+            self._entries[key] = data
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_budget:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= self._sizeof(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+
+
+# ======================
+# Prediction Cache (prediksi mentah 256x256, memory saja)
+# ======================
+class PredictionCache(ResultCache):
+    def __init__(self, memory_budget=PREDICTION_BUDGET_BYTES):
+        super().__init__(cache_dir=None, memory_budget=memory_budget)
+
+    def _sizeof(self, data):
+        return data.nbytes
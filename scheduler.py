@@ -0,0 +1,89 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+MAX_WAIT_MS = 10
+
+_STOP = object()
+
+
+# ======================
+# Micro-batching Scheduler
+# ======================
+class MicroBatchScheduler:
+    # Mengumpulkan request dari banyak session, lalu menjalankan satu
+    # forward pass per batch di satu worker thread. Request boleh membawa
+    # colorizer sendiri (multi-model); batch dikelompokkan per colorizer.
+
+    def __init__(self, colorizer=None, max_batch_size=None, max_wait_ms=MAX_WAIT_MS):
+        self.colorizer = colorizer
+        self.max_batch_size = max_batch_size or colorizer.max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="colorize-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, img_array, colorizer=None):
+        # img_array: (size, size, 3) float32 hasil Colorizer.preprocess
+        if self._closed:
+            raise RuntimeError("Scheduler sudah ditutup")
+        future = Future()
+        self._queue.put((img_array, future, colorizer or self.colorizer))
+        return future
+
+    def colorize_array(self, img_array, timeout=None, colorizer=None):
+        return self.submit(img_array, colorizer).result(timeout)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def _collect(self):
+        item = self._queue.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Selesaikan batch ini dulu, lalu berhenti
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Lewati request yang sudah dibatalkan oleh pemanggilnya
+            groups = {}
+            for img_array, future, colorizer in batch:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(id(colorizer), (colorizer, []))[1].append((img_array, future))
+            for colorizer, group in groups.values():
+                self._predict(colorizer, group)
+
+    def _predict(self, colorizer, group):
+        arrays, futures = zip(*group)
+        try:
+            preds = colorizer.predict_batch(np.stack(arrays))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, pred in zip(futures, preds):
+            future.set_result(pred)
@@ -0,0 +1,215 @@
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_colorize import BatchRunner, add_batch_arguments, check_settings, collect_inputs, job_settings
+from colorizer import model_version
+from history import DB_NAME, HistoryStore
+
+MERGE_BATCH_SIZE = 64
+
+
+# ======================
+# Sharding
+# ======================
+def shard_of(relname, num_shards):
+    # Hash deterministik dari nama relatif (bukan path input): host dengan mount point
+    # berbeda, atau path relatif vs absolut, tetap menghitung shard yang sama
+    digest = hashlib.sha1(relname.replace(os.sep, "/").encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+
+def parse_shards(value, num_shards):
+    # "0-3,6" -> [0, 1, 2, 3, 6]; kosong berarti semua shard
+    if not value:
+        return list(range(num_shards))
+    shards = set()
+    for part in value.split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            shards.update(range(int(start), int(end) + 1))
+        else:
+            shards.add(int(part))
+    invalid = [shard for shard in shards if not 0 <= shard < num_shards]
+    if invalid:
+        raise ValueError(f"Shard di luar rentang 0..{num_shards - 1}: {invalid}")
+    return sorted(shards)
+
+
+def shard_files(output_dir, shard, num_shards):
+    suffix = f"{shard:04d}-of-{num_shards:04d}"
+    return (
+        os.path.join(output_dir, f".done-{suffix}"),
+        os.path.join(output_dir, f".records-{suffix}.jsonl"),
+    )
+
+
+# ======================
+# Worker (satu proses per shard, model dimuat sekali)
+# ======================
+def run_shard(shard, num_shards, items, options):
+    import tensorflow as tf
+
+    # Bagi core CPU antar proses agar tidak saling berebut thread
+    if options["intra_op_threads"]:
+        tf.config.threading.set_intra_op_parallelism_threads(options["intra_op_threads"])
+
+    from colorizer import Colorizer
+
+    colorizer = Colorizer.from_path(options["model"], max_batch_size=options["batch_size"])
+    done_path, records_path = shard_files(options["output_dir"], shard, num_shards)
+    runner = BatchRunner(
+        colorizer, options["output_dir"], output_size=options["output_size"], mode=options["mode"],
+        batch_size=options["batch_size"], decode_workers=options["decode_workers"],
+        encode_workers=options["encode_workers"], queue_size=options["queue_size"],
+        done_path=done_path, records_path=records_path, name=f"[shard {shard}] "
+    )
+    return runner.run(items)
+
+
+def run(args):
+    shards = parse_shards(args.shards, args.num_shards)
+    items = collect_inputs(args.inputs, args.manifest)
+    by_shard = {shard: [] for shard in shards}
+    for item in items:
+        shard = shard_of(item[1], args.num_shards)
+        if shard in by_shard:
+            by_shard[shard].append(item)
+
+    workers = args.workers or min(len(shards), os.cpu_count() or 1)
+    options = {
+        "model": args.model,
+        "output_dir": args.output_dir,
+        "output_size": args.output_size,
+        "mode": args.mode,
+        "batch_size": args.batch_size,
+        "decode_workers": args.decode_workers,
+        "encode_workers": args.encode_workers,
+        "queue_size": args.queue_size,
+        "intra_op_threads": args.intra_op_threads or max(1, (os.cpu_count() or 1) // workers),
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    # Pengaturan dicek di sini agar tidak ada proses yang sempat memuat model
+    settings = job_settings(args.mode, args.output_size, model_version(args.model))
+    try:
+        for shard in shards:
+            check_settings(shard_files(args.output_dir, shard, args.num_shards)[0], settings)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{len(items)} gambar, shard {shards} dari {args.num_shards}, {workers} proses")
+
+    start = time.monotonic()
+    completed = failed = 0
+    # spawn: TensorFlow tidak aman di-fork setelah diinisialisasi
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(run_shard, shard, args.num_shards, shard_items, options)
+            for shard, shard_items in by_shard.items()
+        ]
+        for future in futures:
+            shard_completed, shard_failed = future.result()
+            completed += shard_completed
+            failed += shard_failed
+    elapsed = time.monotonic() - start
+    print(f"Total: {completed} selesai, {failed} gagal • {completed / elapsed:.2f} img/s")
+    return 1 if failed else 0
+
+
+# ======================
+# Merge record history dari semua shard
+# ======================
+def add_records(store, checkpoint_name, batch):
+    # batch: list (offset setelah baris, path input, item); offset di-commit bersama entri
+    try:
+        store.add_many([item for _, _, item in batch], checkpoint=(checkpoint_name, batch[-1][0]))
+        return len(batch)
+    except Exception as e:
+        print(f"Batch gagal ({e}), diulang per record", file=sys.stderr)
+    added = 0
+    for offset, input_path, item in batch:
+        try:
+            store.add_many([item], checkpoint=(checkpoint_name, offset))
+            added += 1
+        except Exception as e:
+            # Gambar rusak / terlalu besar: lewati, tapi offset tetap maju
+            print(f"Lewati {input_path}: {e}", file=sys.stderr)
+            store.add_many([], checkpoint=(checkpoint_name, offset))
+    return added
+
+
+def merge_records(store, records_path):
+    # Lanjut dari offset terakhir yang sudah di-commit: merge yang terputus
+    # bisa diulang tanpa menduplikasi entri. Nama file berisi run id, jadi
+    # checkpoint tidak pernah tertukar dengan file run lain di path yang sama.
+    checkpoint_name = f"merge:{os.path.basename(records_path)}"
+    offset = store.checkpoint(checkpoint_name)
+    merged = 0
+    batch = []
+    with open(records_path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                with open(record["input"], "rb") as original, open(record["output"], "rb") as colorized:
+                    item = (record["timestamp"], original.read(), colorized.read(), None, record.get("model_version"))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Lewati record di offset {offset - len(line)}: {e}", file=sys.stderr)
+                continue
+            batch.append((offset, record["input"], item))
+            if len(batch) >= MERGE_BATCH_SIZE:
+                merged += add_records(store, checkpoint_name, batch)
+                batch = []
+    if batch:
+        merged += add_records(store, checkpoint_name, batch)
+    return merged
+
+
+def merge(args):
+    store = HistoryStore(args.history_db)
+    merged = 0
+    # Hanya run yang sudah selesai (.jsonl); run yang masih berjalan menulis ke .jsonl.part
+    for records_path in sorted(glob.glob(os.path.join(args.output_dir, ".records-*.jsonl"))):
+        merged += merge_records(store, records_path)
+        # File run yang selesai tidak ditulis lagi: aman di-rename agar tidak dibaca ulang
+        os.replace(records_path, f"{records_path}.merged-{time.strftime('%Y%m%d%H%M%S')}")
+    store.close()
+    print(f"{merged} record history digabung ke {args.history_db}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch colorization multi-proses per shard")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = add_batch_arguments(commands.add_parser("run", help="Jalankan shard di host ini"))
+    run_parser.add_argument("--num-shards", type=int, required=True, help="Total shard di semua host")
+    run_parser.add_argument("--shards", default=None, help="Shard untuk host ini, contoh: 0-3,6 (default: semua)")
+    run_parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default: jumlah shard)")
+    run_parser.add_argument("--intra-op-threads", type=int, default=None, help="Thread TensorFlow per proses")
+    run_parser.set_defaults(func=run)
+
+    merge_parser = commands.add_parser("merge", help="Gabungkan record history semua shard")
+    merge_parser.add_argument("--output-dir", required=True)
+    merge_parser.add_argument("--history-db", default=DB_NAME)
+    merge_parser.set_defaults(func=merge)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
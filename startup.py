@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+from PIL import Image
+
+# eager: model mulai dimuat di background saat halaman pertama dirender
+# lazy: model baru dimuat saat gambar pertama diupload / tombol Colorize diklik
+STARTUP_MODE = os.environ.get("COLORIZE_STARTUP", "eager")
+
+STATE_IDLE = "belum dimuat"
+STATE_LOADING = "memuat model"
+STATE_WARMUP = "warmup"
+STATE_READY = "siap"
+STATE_FAILED = "gagal"
+
+
+def warmup_colorizer(colorizer):
+    # Satu gambar dummy lewat preprocess -> predict -> postprocess, agar tracing
+    # graph dan inisialisasi kernel tidak terjadi saat klik pertama
+    colorizer.colorize(Image.new("L", (colorizer.input_size, colorizer.input_size)))
+    return colorizer
+
+
+# ======================
+# Loader Model di Background
+# ======================
+class ModelLoader:
+    # Menjalankan load_fn (lalu warmup_fn) sekali di thread terpisah sehingga
+    # render halaman tidak menunggu import TensorFlow dan load model.
+
+    def __init__(self, load_fn, warmup_fn=None):
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+        self.state = STATE_IDLE
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.state == STATE_READY
+
+    @property
+    def started(self):
+        return self._thread is not None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self.state = STATE_LOADING
+                self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        # Mulai load jika belum (mode lazy), lalu tunggu sampai siap / gagal
+        self.start()
+        self._done.wait(timeout)
+        return self.value
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            value = self.load_fn()
+            self.load_seconds = time.perf_counter() - start
+            if self.warmup_fn is not None:
+                self.state = STATE_WARMUP
+                start = time.perf_counter()
+                self.warmup_fn(value)
+                self.warmup_seconds = time.perf_counter() - start
+            self.value = value
+            self.state = STATE_READY
+        except Exception as e:
+            self.error = e
+            self.state = STATE_FAILED
+        finally:
+            self._done.set()
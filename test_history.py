@@ -0,0 +1,190 @@
+import io
+import sqlite3
+
+from PIL import Image
+
+from history import HistoryStore, blob_hash
+
+
+def png_bytes(color, size=(16, 16)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+ORIGINAL = png_bytes("gray")
+COLORIZED = png_bytes("red")
+COLORIZED_2 = png_bytes("blue")
+
+# Baris (timestamp, original, colorized, latency_ms) yang dipakai semua skema lama
+ROWS = (
+    ("2024-01-01 10:00:00", ORIGINAL, COLORIZED, 100.0),
+    ("2024-01-01 11:00:00", ORIGINAL, COLORIZED_2, None),
+    ("2024-01-02 09:00:00", ORIGINAL, COLORIZED, 300.0),
+)
+
+
+def create_baseline_db(db_path):
+    # Skema awal: BLOB langsung di tabel history, tanpa latency
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                original_image BLOB NOT NULL,
+                colorized_image BLOB NOT NULL
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO history (timestamp, original_image, colorized_image) VALUES (?, ?, ?)",
+            [row[:3] for row in ROWS]
+        )
+
+
+def create_blob_table_db(db_path, with_stats):
+    # Skema dengan tabel blobs (hash, data); with_stats: counter + trigger di tabel blobs
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE history_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                original_hash TEXT NOT NULL,
+                colorized_hash TEXT NOT NULL,
+                original_thumb_hash TEXT,
+                colorized_thumb_hash TEXT,
+                latency_ms REAL,
+                model_version TEXT
+            )
+        """)
+        conn.execute("CREATE TABLE blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        if with_stats:
+            conn.execute("""
+                CREATE TABLE history_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    entry_count INTEGER NOT NULL,
+                    latency_count INTEGER NOT NULL,
+                    latency_total_ms REAL NOT NULL,
+                    blob_bytes INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE TABLE history_daily (day TEXT PRIMARY KEY, entry_count INTEGER NOT NULL)")
+            conn.execute("INSERT INTO history_stats VALUES (1, 0, 0, 0, 0)")
+            conn.execute("""
+                CREATE TRIGGER history_entries_stats_insert AFTER INSERT ON history_entries BEGIN
+                    UPDATE history_stats SET
+                        entry_count = entry_count + 1,
+                        latency_count = latency_count + (NEW.latency_ms IS NOT NULL),
+                        latency_total_ms = latency_total_ms + COALESCE(NEW.latency_ms, 0)
+                    WHERE id = 1;
+                    INSERT INTO history_daily (day, entry_count) VALUES (substr(NEW.timestamp, 1, 10), 1)
+                        ON CONFLICT (day) DO UPDATE SET entry_count = entry_count + 1;
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER blobs_stats_insert AFTER INSERT ON blobs BEGIN
+                    UPDATE history_stats SET blob_bytes = blob_bytes + length(NEW.data) WHERE id = 1;
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER blobs_stats_delete AFTER DELETE ON blobs BEGIN
+                    UPDATE history_stats SET blob_bytes = blob_bytes - length(OLD.data) WHERE id = 1;
+                END
+            """)
+        for timestamp, original, colorized, latency_ms in ROWS:
+            for data in (original, colorized):
+                conn.execute("INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)", (blob_hash(data), data))
+            conn.execute(
+                "INSERT INTO history_entries (timestamp, original_hash, colorized_hash, latency_ms) VALUES (?, ?, ?, ?)",
+                (timestamp, blob_hash(original), blob_hash(colorized), latency_ms)
+            )
+
+
+def unique_bytes(*blobs):
+    return sum(len(data) for data in {blob_hash(data): data for data in blobs}.values())
+
+
+def open_store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"), blob_dir=str(tmp_path / "blobs"))
+
+
+def table_names(store):
+    with store._connect() as conn:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_migrate_baseline_db(tmp_path):
+    create_baseline_db(str(tmp_path / "history.db"))
+    store = open_store(tmp_path)
+
+    stats = store.stats()
+    assert stats.count == 3
+    assert stats.avg_latency_ms is None
+    assert stats.total_bytes == unique_bytes(ORIGINAL, COLORIZED, COLORIZED_2)
+    assert store.daily_counts() == [("2024-01-01", 2), ("2024-01-02", 1)]
+    assert "history" not in table_names(store)
+    assert store.get_blob(blob_hash(COLORIZED_2)) == COLORIZED_2
+    store.close()
+
+
+def test_migrate_blob_table_db_without_stats(tmp_path):
+    create_blob_table_db(str(tmp_path / "history.db"), with_stats=False)
+    store = open_store(tmp_path)
+
+    stats = store.stats()
+    assert stats.count == 3
+    assert stats.avg_latency_ms == 200.0
+    assert stats.total_bytes == unique_bytes(ORIGINAL, COLORIZED, COLORIZED_2)
+    assert store.daily_counts() == [("2024-01-01", 2), ("2024-01-02", 1)]
+    assert "blobs" not in table_names(store)
+    store.close()
+
+
+def test_migrate_blob_table_db_with_stats(tmp_path):
+    create_blob_table_db(str(tmp_path / "history.db"), with_stats=True)
+    store = open_store(tmp_path)
+
+    stats = store.stats()
+    assert stats.count == 3
+    assert stats.avg_latency_ms == 200.0
+    assert stats.total_bytes == unique_bytes(ORIGINAL, COLORIZED, COLORIZED_2)
+    assert store.daily_counts() == [("2024-01-01", 2), ("2024-01-02", 1)]
+    assert "blobs" not in table_names(store)
+    assert store.get_blob(blob_hash(ORIGINAL)) == ORIGINAL
+    store.close()
+
+    # Membuka ulang tidak boleh menghitung ulang atau menggandakan counter
+    store = open_store(tmp_path)
+    assert store.stats() == stats
+    store.close()
+
+
+def test_stats_follow_add_and_clear(tmp_path):
+    store = open_store(tmp_path)
+    store.add(ORIGINAL, COLORIZED, latency_ms=100.0)
+    store.add(ORIGINAL, COLORIZED_2, latency_ms=300.0)
+
+    stats = store.stats()
+    assert stats.count == 2
+    assert stats.avg_latency_ms == 200.0
+    # Blob yang sama (original) hanya dihitung sekali; thumbnail ikut dihitung
+    with store._connect() as conn:
+        assert stats.total_bytes == conn.execute("SELECT SUM(size) FROM blob_files").fetchone()[0]
+    assert sum(count for _, count in store.daily_counts()) == 2
+
+    store.clear()
+    assert store.stats() == (0, None, 0)
+    assert store.daily_counts() == []
+    store.close()
+
+
+def test_thumbnail_of_missing_blob_is_none(tmp_path):
+    create_baseline_db(str(tmp_path / "history.db"))
+    store = open_store(tmp_path)
+    entry = store.list_entries(limit=1)[0]
+    # Entri lama tanpa thumbnail: dibuat dari blob penuh saat pertama diminta
+    assert store.get_thumbnail(entry, colorized=True)
+
+    store.blobs.clear()
+    assert store.get_thumbnail(entry) is None
+    assert store.get_blob(entry.original_hash) is None
+    store.close()
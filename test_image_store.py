@@ -0,0 +1,73 @@
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from image_store import ImageStore
+
+
+def spill_files(store_dir):
+    return sorted(
+        name for _, _, names in os.walk(store_dir) for name in names if not name.endswith(".tmp")
+    )
+
+
+def test_spill_and_reload(tmp_path):
+    store_dir = str(tmp_path / "store")
+    # Budget cukup untuk satu entri: entri lama dievict ke disk
+    store = ImageStore(store_dir, memory_budget=1500)
+    image = Image.new("RGB", (20, 20), (10, 20, 30))
+    array = np.arange(100, dtype=np.float32)
+    store.put("aa.upload", b"x" * 1000)
+    store.put("bb.original", image)
+    store.put("cc.pred", array)
+    assert spill_files(store_dir) == ["aa.upload.bin", "bb.original.img.npy"]
+    assert list(store._entries) == ["cc.pred"]
+
+    for key in ("aa.upload", "bb.original", "cc.pred"):
+        assert key in store
+    assert store.get("aa.upload") == b"x" * 1000
+    reloaded = store.get("bb.original")
+    assert isinstance(reloaded, Image.Image)
+    assert reloaded.tobytes() == image.tobytes()
+    np.testing.assert_array_equal(store.get("cc.pred"), array)
+
+    # Store baru (proses lain) membaca file spill yang sama
+    other = ImageStore(store_dir, memory_budget=1500)
+    assert other.get("aa.upload") == b"x" * 1000
+    assert other.get("missing") is None
+    assert "missing" not in other
+
+
+def test_prune_by_age(tmp_path):
+    store_dir = str(tmp_path / "store")
+    store = ImageStore(store_dir, memory_budget=1)
+    store.put("aa.old", b"o" * 10)
+    store.put("bb.new", b"n" * 10)
+    store.put("cc.last", b"l" * 10)
+    old_path = store._path("aa.old", "bin")
+    stale = time.time() - 3600
+    os.utime(old_path, (stale, stale))
+
+    store.prune(max_age=60)
+    assert not os.path.exists(old_path)
+    assert "aa.old" not in store
+    assert store.get("bb.new") == b"n" * 10
+
+
+def test_prune_to_disk_budget_removes_oldest(tmp_path):
+    store_dir = str(tmp_path / "store")
+    store = ImageStore(store_dir, memory_budget=1, disk_budget=10 ** 9)
+    keys = [f"{index:02d}.upload" for index in range(5)]
+    for key in keys:
+        store.put(key, b"z" * 100)
+    # mtime berurutan: entri pertama paling lama tidak diakses
+    now = time.time()
+    for index, key in enumerate(keys[:-1]):
+        os.utime(store._path(key, "bin"), (now - 100 + index, now - 100 + index))
+
+    store.disk_budget = 250
+    store.prune()
+    assert spill_files(store_dir) == ["02.upload.bin", "03.upload.bin"]
+    assert store.get("00.upload") is None
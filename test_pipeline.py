@@ -0,0 +1,87 @@
+import random
+import threading
+import time
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+
+def test_end_of_stream_flushes_partial_batch():
+    batches = []
+
+    def double(values):
+        batches.append(len(values))
+        return [value * 2 for value in values]
+
+    # Batch tidak pernah penuh dan max_wait panjang: sisa item harus diproses saat close
+    pipeline = Pipeline([Stage("double", double, batch_size=4, max_wait_ms=60000)])
+    futures = [pipeline.submit(value) for value in range(3)]
+    pipeline.close()
+    assert [future.result(1) for future in futures] == [0, 2, 4]
+    assert batches == [3]
+
+
+def test_map_keeps_input_order():
+    def slow(value):
+        time.sleep(random.random() * 0.01)
+        return value
+
+    with Pipeline([
+        Stage("first", slow, workers=4),
+        Stage("batch", lambda values: [value + 1 for value in values], batch_size=3),
+        Stage("last", slow, workers=4),
+    ], queue_size=2) as pipeline:
+        results = list(pipeline.map(range(50)))
+    assert [item for item, _, _ in results] == list(range(50))
+    assert [result for _, result, _ in results] == [value + 1 for value in range(50)]
+    assert all(error is None for _, _, error in results)
+
+
+def test_error_propagates_to_item_only():
+    seen = []
+
+    def check(value):
+        if value == 2:
+            raise ValueError("rusak")
+        return value
+
+    def record(value):
+        seen.append(value)
+        return value
+
+    with Pipeline([Stage("check", check), Stage("record", record)]) as pipeline:
+        results = list(pipeline.map(range(5)))
+    assert [result for _, result, _ in results] == [0, 1, None, 3, 4]
+    assert isinstance(results[2][2], ValueError)
+    # Item yang gagal tidak diteruskan ke stage berikutnya
+    assert sorted(seen) == [0, 1, 3, 4]
+
+
+def test_cancelled_item_is_skipped():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def blocking(value):
+        calls.append(value)
+        started.set()
+        release.wait(5)
+        return value
+
+    pipeline = Pipeline([Stage("blocking", blocking)])
+    first = pipeline.submit("a")
+    started.wait(5)
+    # Masih di queue (worker sibuk dengan item pertama): bisa dibatalkan
+    second = pipeline.submit("b")
+    assert second.cancel()
+    release.set()
+    pipeline.close()
+    assert first.result(1) == "a"
+    assert calls == ["a"]
+
+
+def test_submit_after_close_raises():
+    pipeline = Pipeline([Stage("noop", lambda value: value)])
+    pipeline.close()
+    with pytest.raises(RuntimeError):
+        pipeline.submit(1)
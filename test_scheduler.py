@@ -0,0 +1,52 @@
+import threading
+
+import numpy as np
+
+from scheduler import MicroBatchScheduler
+
+
+class FakeColorizer:
+    # Mencatat ukuran setiap batch; output = input * factor agar asal hasil bisa dicek
+    def __init__(self, factor, max_batch_size=8):
+        self.factor = factor
+        self.max_batch_size = max_batch_size
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def predict_batch(self, batch):
+        with self.lock:
+            self.batches.append(len(batch))
+        return batch * self.factor
+
+
+def test_batches_grouped_per_colorizer():
+    first, second = FakeColorizer(2), FakeColorizer(3)
+    scheduler = MicroBatchScheduler(first, max_wait_ms=500)
+    try:
+        # Request dua model diselang-seling masuk ke satu jendela batch
+        requests = [(np.full((2, 2, 3), i, np.float32), [first, second][i % 2]) for i in range(5)]
+        futures = [scheduler.submit(img_array, colorizer) for img_array, colorizer in requests]
+        for (img_array, colorizer), future in zip(requests, futures):
+            np.testing.assert_array_equal(future.result(5), img_array * colorizer.factor)
+    finally:
+        scheduler.close()
+    assert first.batches == [3]
+    assert second.batches == [2]
+
+
+def test_default_colorizer_and_error_per_group():
+    class Broken(FakeColorizer):
+        def predict_batch(self, batch):
+            raise RuntimeError("rusak")
+
+    default, broken = FakeColorizer(1), Broken(1)
+    scheduler = MicroBatchScheduler(default, max_wait_ms=500)
+    try:
+        ok = scheduler.submit(np.ones((2, 2, 3), np.float32))
+        failed = scheduler.submit(np.ones((2, 2, 3), np.float32), broken)
+        # Error satu model tidak menggagalkan request model lain di batch yang sama
+        np.testing.assert_array_equal(ok.result(5), np.ones((2, 2, 3), np.float32))
+        assert isinstance(failed.exception(5), RuntimeError)
+    finally:
+        scheduler.close()
+    assert default.batches == [1]
@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from batch_colorize import BatchRunner, collect_inputs
+from colorizer import Colorizer
+from history import HistoryStore
+from shard_runner import merge, shard_files
+
+INPUT_SIZE = 32
+
+
+class FakeModel:
+    # Meniru model.predict Keras: output = input (cukup untuk menguji alur file)
+    def predict(self, batch, batch_size=None, verbose=0):
+        return np.asarray(batch)
+
+
+def write_inputs(input_dir, names):
+    os.makedirs(input_dir, exist_ok=True)
+    for index, name in enumerate(names):
+        Image.new("L", (48, 40), index * 30).save(os.path.join(input_dir, name))
+
+
+def run_shard(input_dir, output_dir):
+    done_path, records_path = shard_files(output_dir, 0, 1)
+    runner = BatchRunner(
+        Colorizer(FakeModel(), INPUT_SIZE, version="fake"), output_dir, batch_size=2,
+        decode_workers=1, encode_workers=1, done_path=done_path, records_path=records_path
+    )
+    return runner.run(collect_inputs([input_dir]))
+
+
+def run_merge(output_dir, history_db):
+    return merge(argparse.Namespace(output_dir=output_dir, history_db=history_db))
+
+
+def history_count(history_db):
+    store = HistoryStore(history_db)
+    try:
+        return store.count()
+    finally:
+        store.close()
+
+
+def test_merge_rerun_shard_merge_again(tmp_path):
+    input_dir, output_dir, history_db = str(tmp_path / "in"), str(tmp_path / "out"), str(tmp_path / "h.db")
+    write_inputs(input_dir, ["a.png", "b.png", "c.png", "d.png"])
+    assert run_shard(input_dir, output_dir) == (4, 0)
+    run_merge(output_dir, history_db)
+    assert history_count(history_db) == 4
+
+    # Run berikutnya untuk shard yang sama hanya memproses input baru
+    write_inputs(input_dir, ["e.png", "f.png"])
+    assert run_shard(input_dir, output_dir) == (2, 0)
+    run_merge(output_dir, history_db)
+    assert history_count(history_db) == 6
+
+    # Merge ulang tanpa run baru tidak menduplikasi
+    run_merge(output_dir, history_db)
+    assert history_count(history_db) == 6
+
+
+def test_merge_skips_running_shard_and_adopts_killed_run(tmp_path):
+    input_dir, output_dir, history_db = str(tmp_path / "in"), str(tmp_path / "out"), str(tmp_path / "h.db")
+    write_inputs(input_dir, ["a.png"])
+    run_shard(input_dir, output_dir)
+    run_merge(output_dir, history_db)
+
+    # Run yang masih berjalan (atau di-kill) menulis ke .part: belum di-merge
+    _, records_path = shard_files(output_dir, 0, 1)
+    part_path = f"{os.path.splitext(records_path)[0]}.killed.jsonl.part"
+    with open(part_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "input": os.path.join(input_dir, "a.png"),
+            "output": os.path.join(output_dir, "a.png"),
+            "timestamp": "2024-01-01 00:00:00",
+            "model_version": "fake",
+        }) + "\n")
+    run_merge(output_dir, history_db)
+    assert history_count(history_db) == 1
+
+    # Run berikutnya menyelesaikan file .part yang ditinggalkan run sebelumnya
+    run_shard(input_dir, output_dir)
+    assert not os.path.exists(part_path)
+    run_merge(output_dir, history_db)
+    assert history_count(history_db) == 2
@@ -0,0 +1,59 @@
+import numpy as np
+from PIL import Image
+
+TILE_OVERLAP = 32
+
+
+# ======================
+# Tiled Colorization (full resolution)
+# ======================
+def tile_origins(length, tile, overlap):
+    # Posisi awal tile sepanjang satu sumbu; tile terakhir menempel ke tepi
+    if length <= tile:
+        return [0]
+    stride = tile - overlap
+    origins = list(range(0, length - tile, stride))
+    origins.append(length - tile)
+    return origins
+
+
+def feather_weights(tile, overlap):
+    # Bobot 2D yang menurun linear di area overlap agar seam tidak terlihat
+    ramp = np.minimum(np.arange(tile) + 1, np.arange(tile)[::-1] + 1).astype(np.float32)
+    ramp = np.clip(ramp / (overlap + 1), 1e-3, 1.0)
+    return np.outer(ramp, ramp)[..., np.newaxis]
+
+
+def colorize_tiled(colorizer, image, output_size=None, overlap=TILE_OVERLAP, tile_batch_size=None):
+    tile = colorizer.input_size
+    tile_batch_size = tile_batch_size or colorizer.max_batch_size
+    image = image.convert("RGB")
+    if output_size is not None:
+        image = image.resize(output_size, Image.LANCZOS)
+    width, height = image.size
+
+    src = np.asarray(image, dtype=np.float32) / 255.0
+    # Gambar lebih kecil dari satu tile di-pad dulu, lalu dipotong di akhir
+    pad_h, pad_w = max(0, tile - height), max(0, tile - width)
+    if pad_h or pad_w:
+        src = np.pad(src, ((0, pad_h), (0, pad_w), (0, 0)), mode="edge")
+    padded_h, padded_w = src.shape[:2]
+
+    weights = feather_weights(tile, overlap)
+    acc = np.zeros((padded_h, padded_w, 3), dtype=np.float32)
+    norm = np.zeros((padded_h, padded_w, 1), dtype=np.float32)
+
+    coords = [(y, x) for y in tile_origins(padded_h, tile, overlap) for x in tile_origins(padded_w, tile, overlap)]
+    # Memori inferensi dibatasi tile_batch_size, bukan ukuran gambar
+    batch = np.empty((tile_batch_size, tile, tile, 3), dtype=np.float32)
+    for start in range(0, len(coords), tile_batch_size):
+        chunk = coords[start:start + tile_batch_size]
+        for i, (y, x) in enumerate(chunk):
+            batch[i] = src[y:y + tile, x:x + tile]
+        preds = colorizer.predict_batch(batch[:len(chunk)])
+        for (y, x), pred in zip(chunk, preds):
+            acc[y:y + tile, x:x + tile] += np.clip(pred, 0, 1) * weights
+            norm[y:y + tile, x:x + tile] += weights
+
+    result = (acc / norm)[:height, :width]
+    return Image.fromarray((result * 255).round().astype(np.uint8))